@@ -1,8 +1,11 @@
-import re
 import logging
-import pandas as pd
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from html_tokenizer import tokenize, render, normalize_tokens, remove_formatting_tokens, text_from_tokens
+from html_structure import HTMLStructure, KIND_TEXT
+from reconstruction import reconstruct
 from config import LANGUAGE_CONFIG
+from parallel import parallel_map
+from columnar import read_table, write_table
 from collections import Counter
 
 logger = logging.getLogger('csv_html_processor')
@@ -15,18 +18,12 @@ class HTMLProcessor:
     @staticmethod
     def remove_formatting(s: str) -> str:
         """Cleans and standardizes HTML formatting while preserving structure"""
-        s = re.sub(r'\s+', ' ', s.replace("\n", " ").replace("\t", " ").replace("\r", " "))
-        s = s.replace("> <", "><").replace(" <br>", "<br>").replace("<br> ", "<br>")
-        return s
+        return render(remove_formatting_tokens(tokenize(s)))
 
     @staticmethod
     def normalize_html(content: str) -> str:
         """Standardizes HTML formatting to reduce mismatches."""
-        content = re.sub(r'\s+', ' ', content)  # Remove extra spaces
-        content = content.replace("> <", "><")  # Fix tag spacing
-        content = re.sub(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"', r'\1',
-                         content)  # Remove unnecessary attributes
-        return content
+        return render(normalize_tokens(tokenize(content)))
 
     @staticmethod
     def truncate_str(s: str, length: int = 30) -> str:
@@ -34,79 +31,75 @@ class HTMLProcessor:
         return f"{s[:length]}...{s[-length:]}" if len(s) > length * 2 else s
 
     @staticmethod
-    def extract_html_structure(content: str) -> List[List]:
-        """Extracts HTML structure from content, preserving comments and self-closing tags."""
-        structure = []
-        pattern = re.compile(r'(<[^>]+>|<!--.*?-->|[^<]+)')
-        for match in pattern.finditer(content):
-            item = match.group(1)
-            end_position = match.end()
-            if item.strip():
-                structure.append([item, item.startswith('<') and item.endswith('>'), end_position])
-        return structure
+    def extract_html_structure(content: str) -> HTMLStructure:
+        """
+        Extracts HTML structure from content, preserving comments and self-closing tags.
+        Items index like the legacy [item, is_tag, end] lists but are stored as offsets into content.
+        """
+        return HTMLStructure.parse(content)
 
     @staticmethod
     def extract_translatable_text(content: str) -> str:
         """Extracts only translatable text from HTML while preserving structure."""
-        return re.sub(r'<[^>]+>', '', content).strip()
+        return text_from_tokens(tokenize(content)).strip()
 
     @staticmethod
-    def validate_html_structure(original_structure: List[List], translated_content: str, start_position: int,
+    def preprocess(content: str) -> Tuple[str, HTMLStructure, str]:
+        """Normalizes content and extracts its structure and translatable text from a single token pass."""
+        tokens = normalize_tokens(tokenize(content))
+        normalized = render(tokens)
+        return normalized, HTMLStructure.from_tokens(normalized, tokens), text_from_tokens(tokens).strip()
+
+    @staticmethod
+    def process_cell(content: str) -> Tuple[str, str, str]:
+        """Returns (normalized, translatable text, reconstructed) for one cell; the structure stays in the worker."""
+        normalized, structure, translatable = HTMLProcessor.preprocess(content)
+        return normalized, translatable, reconstruct(structure, normalized)
+
+    @staticmethod
+    def validate_html_structure(original_structure: HTMLStructure, translated_content: str, start_position: int,
                                 leftover: str) -> Tuple[int, str]:
         """Validates translated content against original HTML structure."""
+        original_structure = HTMLStructure.from_items(original_structure)
         translated_structure = HTMLProcessor.extract_html_structure(leftover + translated_content)
 
-        for i, (orig, trans) in enumerate(zip(original_structure[start_position:], translated_structure)):
-            if orig[1] != trans[1] or (
-                    orig[1] and re.split(r'[\s>]', orig[0])[0].lower() != re.split(r'[\s>]', trans[0])[0].lower()):
+        original_kinds = original_structure.kinds
+        translated_kinds = translated_structure.kinds
+        for i in range(min(len(original_structure) - start_position, len(translated_structure))):
+            is_tag = original_kinds[start_position + i] != KIND_TEXT
+            if is_tag != (translated_kinds[i] != KIND_TEXT) or (
+                    is_tag and original_structure.tag_key(start_position + i) != translated_structure.tag_key(i)):
                 logger.error(f"Structure mismatch: Original {start_position}-{start_position + i} | Translated 0-{i}")
                 return start_position, leftover  # Avoid raising error, return as is
 
         end_position = start_position + len(translated_structure)
-        leftover = "" if translated_structure[-1][1] else leftover
-        if not translated_structure[-1][1]:
+        last_is_tag = translated_structure.is_tag(-1)
+        leftover = "" if last_is_tag else leftover
+        if not last_is_tag:
             end_position -= 1
 
         return end_position, leftover
 
     @staticmethod
-    def reconstruct_html_from_structure(original_structure: List[List], translated_content: str) -> str:
+    def reconstruct_html_from_structure(original_structure: HTMLStructure, translated_content: str) -> str:
         """Reconstructs HTML content while preserving original structure, but only translating necessary parts."""
-        result = translated_content
-        search_start = 0
-
-        for item in original_structure:
-            if item[1]:  # is HTML tag or comment, leave it alone
-                tag_position = result.find("<", search_start)
-                if tag_position != -1:
-                    result = result[:tag_position] + item[0] + result[tag_position:]
-                    search_start = tag_position + len(item[0])
-                continue
-
-            # Allow translatable text inside specific tags
-            if re.match(r'<(button|label|title|span|h1|h2|h3|p)>', item[0]):
-                result = result.replace(item[0], HTMLProcessor.extract_translatable_text(item[0]))
-                continue
-
-            # Keep <a> tags intact but allow text inside them to be translated
-            if item[0].startswith("<a ") and item[0].endswith("</a>"):
-                inner_text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', item[0])
-                translated_inner = HTMLProcessor.extract_translatable_text(inner_text)
-                result = result.replace(inner_text, translated_inner)
-                continue
-
-        return result
-
-    def process_csv(self, input_csv: str, output_csv: str, html_columns: List[str]):
-        """Process CSV file, applying HTML structure validation and reconstruction to specified columns."""
-        df = pd.read_csv(input_csv)
+        return reconstruct(original_structure, translated_content)
+
+    def process_csv(self, input_csv: str, output_csv: str, html_columns: List[str], workers: Optional[int] = None):
+        """
+        Process CSV file, applying HTML structure validation and reconstruction to specified columns.
+        Cells are processed on a pool of workers (PARALLEL_CONFIG['workers'] unless given). Input and
+        output may be CSV, Parquet or Arrow files (by suffix).
+        """
+        df = read_table(input_csv)
 
         for column in html_columns:
             if column in df.columns:
-                df[column] = df[column].apply(self.normalize_html)  # Apply normalization before processing
-                df[f'{column}_translatable'] = df[column].apply(self.extract_translatable_text)
-                df[f'{column}_processed'] = df[column].apply(
-                    lambda x: self.reconstruct_html_from_structure(self.extract_html_structure(str(x)), str(x)))
+                # Normalize, extract structure and extract text from one token pass per cell
+                cells = parallel_map(self.process_cell, df[column].astype(str).tolist(), workers)
+                df[column] = [cell[0] for cell in cells]
+                df[f'{column}_translatable'] = [cell[1] for cell in cells]
+                df[f'{column}_processed'] = [cell[2] for cell in cells]
 
-        df.to_csv(output_csv, index=False)
+        write_table(df, output_csv)
         print(f"Processed CSV saved as {output_csv}")
@@ -0,0 +1,446 @@
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+from config import API_CONFIG, BACKEND_CONFIG
+from batch_packing import build_batch_messages, parse_batch_reply
+from html_tokenizer import tokenize, TEXT
+from html_structure import StructureMonitor
+from metrics import METRICS
+
+logger = logging.getLogger('website_translator')
+
+# Placeholder runs (and whitespace) at either end of a masked segment, and the text between them
+_EDGE_PLACEHOLDERS_RE = re.compile(r'((?:\s*\[\[\d+\]\])*\s*)(.*?)((?:\s*\[\[\d+\]\])*\s*)', re.DOTALL)
+
+# Rough per-request overhead of the system message and translation instructions
+PROMPT_OVERHEAD_TOKENS = 90
+
+
+def _import_openai():
+    """Imports openai on first use: it is optional, and slow enough to import to matter for short jobs."""
+    try:
+        import openai
+    except ImportError as e:
+        raise ImportError("The OpenAI backend requires the openai package.") from e
+    return openai
+
+
+def estimate_chat_tokens(content: str) -> int:
+    """Approximate tokens of one chat-completions request for content: the prompt plus a reply as long as it."""
+    return PROMPT_OVERHEAD_TOKENS + 2 * (len(content) // 4 + 1)
+
+
+def build_messages(content: str, target_language: str) -> List[Dict[str, str]]:
+    """Builds the chat messages asking the model to translate HTML content."""
+    prompt = f"""
+        You are a professional translator. Translate the following Turkish HTML content into {target_language}.
+        - Preserve all HTML tags and formatting.
+        - Only translate readable text within the tags.
+        - Do NOT alter or remove any tags.
+        - Keep every [[n]] placeholder exactly as written; each stands for markup.
+        - Output should be in HTML format, identical in structure to the input but translated.
+
+        Content:
+        {content}
+        """
+
+    return [
+        {"role": "system",
+         "content": "You are an AI trained for preserving HTML structures while translating content."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class RetryableError(Exception):
+    """A transient backend failure (rate limit, timeout, 5xx) worth retrying."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, rate_limited: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.rate_limited = rate_limited  # An HTTP 429, counted separately in the run metrics
+
+
+class StreamAborted(RetryableError):
+    """A streamed reply stopped early because its structure diverged; the engine re-sends it at once."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retry_after=0.0)
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Reads retry-after-ms / retry-after (seconds) from HTTP response headers."""
+    if headers is None:
+        return None
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after') is not None:
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class TranslationBackend:
+    """Common interface for translation services used by AsyncTranslationEngine."""
+    name = 'backend'
+    supports_batching = False
+
+    async def translate(self, content: str, target_language: str) -> str:
+        raise NotImplementedError
+
+    async def translate_batch(self, segments: Dict[str, str], target_language: str) -> Dict[str, str]:
+        """Translates labelled segments in one request; IDs missing from the result are retried singly."""
+        raise NotImplementedError
+
+    def batchable(self, content: str) -> bool:
+        """Whether content may be packed into a translate_batch request; others are sent on their own."""
+        return True
+
+    def estimate_tokens(self, content: str) -> int:
+        """Approximate tokens consumed by one request, used for tokens/min throttling."""
+        return len(content) // 4 + 1
+
+    async def aclose(self):
+        pass
+
+
+class OpenAIAsyncBackend(TranslationBackend):
+    """
+    Chat-completions backend; base_url can point at a local mock server for testing. With stream,
+    single-segment replies are checked marker by marker as they arrive and aborted with
+    StreamAborted once they can no longer match the source structure, instead of paying for the
+    rest. The engine then re-sends the request through its rate limiters like any other retry.
+    """
+    supports_batching = True
+
+    def __init__(self, api_key: str, model: str = API_CONFIG['model'],
+                 base_url: Optional[str] = API_CONFIG.get('base_url'),
+                 max_tokens: int = API_CONFIG['max_tokens'], temperature: float = API_CONFIG['temperature'],
+                 stream: bool = API_CONFIG.get('stream', False),
+                 stream_attempts: int = API_CONFIG.get('stream_attempts', 1)):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = None  # Created on first use so it belongs to the running event loop
+        self.name = model
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.stream = stream
+        self.stream_attempts = stream_attempts
+        self._aborts = Counter()  # Aborted streamed attempts per (content, target language) still being retried
+
+    async def _complete(self, messages: List[Dict[str, str]], monitor: Optional[StructureMonitor] = None,
+                        **kwargs) -> Optional[str]:
+        """The reply to messages; with a monitor it is streamed, and None means it was aborted."""
+        openai = _import_openai()
+        if self.client is None:
+            # Retries are handled by the engine so that they share the rate limiter
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        if monitor is not None:
+            kwargs.update(stream=True, stream_options={"include_usage": True})
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                **kwargs
+            )
+            if monitor is not None:
+                return await self._read_stream(response, messages, monitor)
+        except openai.RateLimitError as e:
+            raise RetryableError(str(e), retry_after=parse_retry_after(e.response.headers), rate_limited=True) from e
+        except (openai.APIConnectionError, openai.InternalServerError) as e:
+            raise RetryableError(str(e)) from e
+        if response.usage is not None:
+            METRICS.count('tokens_in', response.usage.prompt_tokens)
+            METRICS.count('tokens_out', response.usage.completion_tokens)
+        return response.choices[0].message.content.strip()
+
+    async def _read_stream(self, stream, messages: List[Dict[str, str]], monitor: StructureMonitor) -> Optional[str]:
+        parts = []
+        async for event in stream:
+            if event.usage is not None:  # Sent last, only when the reply ran to the end
+                METRICS.count('tokens_in', event.usage.prompt_tokens)
+                METRICS.count('tokens_out', event.usage.completion_tokens)
+            if not event.choices or not event.choices[0].delta.content:
+                continue
+            parts.append(event.choices[0].delta.content)
+            if not monitor.feed(parts[-1]):
+                await stream.close()
+                # No usage arrives for an aborted stream; count what was sent and received so far
+                METRICS.count('tokens_in', sum(len(message['content']) for message in messages) // 4 + 1)
+                METRICS.count('tokens_out', len(monitor.reply) // 4 + 1)
+                return None
+        return "".join(parts).strip()
+
+    async def translate(self, content: str, target_language: str) -> str:
+        messages = build_messages(content, target_language)
+        key = (content, target_language)
+        # After stream_attempts aborts the request runs unmonitored, so a reply that still does not
+        # match reaches the caller's validation and fallback
+        if not self.stream or self._aborts[key] >= self.stream_attempts:
+            self._aborts.pop(key, None)
+            return await self._complete(messages)
+        monitor = StructureMonitor(content)
+        translated = await self._complete(messages, monitor)
+        if translated is None:
+            self._aborts[key] += 1
+            METRICS.count('stream_aborts')
+            raise StreamAborted(f"Aborted streamed reply at {len(monitor.reply)} characters: {monitor.mismatch}")
+        self._aborts.pop(key, None)
+        return translated
+
+    async def translate_batch(self, segments: Dict[str, str], target_language: str) -> Dict[str, str]:
+        reply = await self._complete(build_batch_messages(segments, target_language),
+                                     response_format={"type": "json_object"})
+        return parse_batch_reply(reply, list(segments))
+
+    def estimate_tokens(self, content: str) -> int:
+        return estimate_chat_tokens(content)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+class GoogleTranslatorBackend(TranslationBackend):
+    """deep_translator.GoogleTranslator run on worker threads, one translator per target language."""
+    name = 'google'
+
+    def __init__(self, source_language: str = 'tr'):
+        self.source_language = source_language
+        self._translators = {}
+
+    async def translate(self, content: str, target_language: str) -> str:
+        translator = self._translators.get(target_language)
+        if translator is None:
+            try:
+                from deep_translator import GoogleTranslator  # Optional, imported on first use
+            except ImportError as e:
+                raise ImportError("The Google backend requires the deep_translator package.") from e
+            translator = GoogleTranslator(source=self.source_language, target=target_language.lower())
+            self._translators[target_language] = translator
+        try:
+            return await asyncio.to_thread(translator.translate, content)
+        except Exception as e:
+            # deep_translator does not distinguish transient failures; retry all of them
+            raise RetryableError(str(e)) from e
+
+
+class MockBackend(TranslationBackend):
+    """
+    Deterministic offline backend for load tests. "Translates" by upper-casing text outside tags
+    and placeholders, after a simulated latency. Failures and 429s are drawn from a hash of the
+    seed, the request and its attempt number, so a run repeats exactly whatever the scheduling.
+    """
+    name = 'mock'
+    supports_batching = True
+
+    def __init__(self, latency: float = BACKEND_CONFIG['mock']['latency'],
+                 latency_jitter: float = BACKEND_CONFIG['mock']['latency_jitter'],
+                 failure_rate: float = BACKEND_CONFIG['mock']['failure_rate'],
+                 rate_limit_rate: float = BACKEND_CONFIG['mock']['rate_limit_rate'],
+                 seed: int = BACKEND_CONFIG['mock']['seed']):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self._attempts = Counter()
+
+    def _draw(self, key: str, salt: str) -> float:
+        """A uniform number in [0, 1) fixed by the seed, the request key and salt."""
+        digest = hashlib.sha256(f"{self.seed}|{salt}|{key}".encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+    async def _respond(self, key: str):
+        attempt = self._attempts[key]
+        self._attempts[key] += 1
+        await asyncio.sleep(self.latency + self.latency_jitter * self._draw(key, f"latency-{attempt}"))
+        if self._draw(key, f"429-{attempt}") < self.rate_limit_rate:
+            raise RetryableError("Mock rate limit", retry_after=self.latency, rate_limited=True)
+        if self._draw(key, f"failure-{attempt}") < self.failure_rate:
+            raise RetryableError("Mock transient failure")
+
+    @staticmethod
+    def mock_translate(content: str) -> str:
+        return "".join(token.text.upper() if token.kind == TEXT else token.text for token in tokenize(content))
+
+    async def translate(self, content: str, target_language: str) -> str:
+        await self._respond(f"{target_language}|{content}")
+        translated = self.mock_translate(content)
+        METRICS.count('tokens_in', self.estimate_tokens(content))
+        METRICS.count('tokens_out', self.estimate_tokens(translated))
+        return translated
+
+    async def translate_batch(self, segments: Dict[str, str], target_language: str) -> Dict[str, str]:
+        await self._respond(f"{target_language}|" + "\x1f".join(segments.values()))
+        return {key: self.mock_translate(content) for key, content in segments.items()}
+
+
+class BackendStats:
+    """Exponentially smoothed request latency and error rate of one backend."""
+    __slots__ = ('smoothing', 'latency', 'error_rate', 'requests')
+
+    def __init__(self, smoothing: float):
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+
+    def record(self, seconds: float, failed: bool):
+        weight = self.smoothing
+        self.requests += 1
+        self.latency = seconds if self.latency is None else (1 - weight) * self.latency + weight * seconds
+        self.error_rate = (1 - weight) * self.error_rate + weight * (1.0 if failed else 0.0)
+
+
+class RouterBackend(TranslationBackend):
+    """
+    Sends each segment to a fast MT backend or a quality (LLM) backend. Short segments whose text
+    has no markup inside it (placeholders at the edges are kept aside) go to the fast backend
+    while it is healthy, meaning its smoothed error rate is below max_error_rate and it is not
+    slower per request than the quality backend. Everything else, and anything the fast backend
+    fails on, goes to the quality backend.
+
+    Every request, fast or quality, is one engine request: segments routed fast are kept out of
+    packed requests (see batchable), and a fast failure raises a RetryableError so that the engine
+    re-sends the segment, which then goes to the quality backend under the same rate limiters.
+    """
+    supports_batching = True
+
+    def __init__(self, fast: TranslationBackend, quality: TranslationBackend,
+                 max_fast_tokens: int = BACKEND_CONFIG['router']['max_fast_tokens'],
+                 max_error_rate: float = BACKEND_CONFIG['router']['max_error_rate'],
+                 latency_smoothing: float = BACKEND_CONFIG['router']['latency_smoothing'],
+                 probe_interval: int = BACKEND_CONFIG['router']['probe_interval']):
+        self.fast = fast
+        self.quality = quality
+        # Its own memory namespace, so routed translations are not mistaken for pure LLM ones
+        self.name = f"router({fast.name},{quality.name})"
+        self.supports_batching = quality.supports_batching
+        self.max_fast_tokens = max_fast_tokens
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self.stats = {'fast': BackendStats(latency_smoothing), 'quality': BackendStats(latency_smoothing)}
+        self._avoided = 0  # Eligible segments kept from the unhealthy fast backend since the last probe
+        self._routed_fast = Counter()  # Segments batchable() routed fast, awaiting their translate() call
+        self._failed_over = Counter()  # Segments the fast backend failed on, awaiting their re-sent request
+
+    @staticmethod
+    def split_edges(content: str):
+        """(leading placeholders, text, trailing placeholders), with the surrounding whitespace kept at the edges."""
+        match = _EDGE_PLACEHOLDERS_RE.fullmatch(content)
+        return match.group(1), match.group(2), match.group(3)
+
+    def fast_healthy(self) -> bool:
+        fast, quality = self.stats['fast'], self.stats['quality']
+        if fast.error_rate > self.max_error_rate:
+            return False
+        return fast.latency is None or quality.latency is None or fast.latency <= quality.latency
+
+    def route_fast(self, content: str) -> bool:
+        """Whether content goes to the fast backend; call once per segment (it also schedules probes)."""
+        text = self.split_edges(content)[1]
+        if '[[' in text or '<' in text or not text.strip() or self.fast.estimate_tokens(text) > self.max_fast_tokens:
+            return False
+        if self.fast_healthy():
+            return True
+        # Let the occasional segment through so the fast backend's measurements can recover
+        self._avoided += 1
+        if self._avoided >= self.probe_interval:
+            self._avoided = 0
+            return True
+        return False
+
+    async def _timed(self, route: str, request):
+        start = time.perf_counter()
+        try:
+            result = await request
+        except Exception:
+            self.stats[route].record(time.perf_counter() - start, True)
+            raise
+        self.stats[route].record(time.perf_counter() - start, False)
+        return result
+
+    @staticmethod
+    def _take(pending: Counter, key) -> bool:
+        """Consumes one pending decision for key, if there is one."""
+        if not pending[key]:
+            return False
+        pending[key] -= 1
+        if not pending[key]:
+            del pending[key]
+        return True
+
+    def batchable(self, content: str) -> bool:
+        """Routes content (once per segment, before packing); fast segments must be sent on their own."""
+        if self.route_fast(content):
+            self._routed_fast[content] += 1
+            return False
+        return True
+
+    async def _translate_fast(self, content: str, target_language: str) -> str:
+        leading, text, trailing = self.split_edges(content)
+        try:
+            translated = await self._timed('fast', self.fast.translate(text, target_language))
+            if not translated or not translated.strip():
+                raise ValueError("empty translation")
+        except Exception as e:
+            METRICS.count('router_failovers')
+            self._failed_over[content, target_language] += 1
+            raise RetryableError(f"{self.fast.name} failed ({e}); re-sending the segment to {self.quality.name}",
+                                 retry_after=0.0) from e
+        METRICS.count('router_fast')
+        return f"{leading}{translated.strip()}{trailing}"
+
+    async def _translate_quality(self, content: str, target_language: str) -> str:
+        METRICS.count('router_quality')
+        return await self._timed('quality', self.quality.translate(content, target_language))
+
+    async def translate(self, content: str, target_language: str) -> str:
+        if self._take(self._failed_over, (content, target_language)):
+            return await self._translate_quality(content, target_language)
+        if self._take(self._routed_fast, content) or self.route_fast(content):
+            return await self._translate_fast(content, target_language)
+        return await self._translate_quality(content, target_language)
+
+    async def translate_batch(self, segments: Dict[str, str], target_language: str) -> Dict[str, str]:
+        # batchable() keeps fast segments out of packed requests, so these all go to the quality backend
+        METRICS.count('router_quality', len(segments))
+        return await self._timed('quality', self.quality.translate_batch(segments, target_language))
+
+    def estimate_tokens(self, content: str) -> int:
+        # Throttle as if every segment went to the quality backend, whose limits are the tight ones
+        return self.quality.estimate_tokens(content)
+
+    async def aclose(self):
+        await self.fast.aclose()
+        await self.quality.aclose()
+
+
+def create_backend(name: Optional[str] = None, api_key: Optional[str] = None, **options) -> TranslationBackend:
+    """
+    Builds the backend named by name (default BACKEND_CONFIG['backend']): 'openai', 'google',
+    'mock' or 'router' (BACKEND_CONFIG['router'] fast and quality backends, built here with
+    api_key). Options are passed to the backend's constructor.
+    """
+    name = name or BACKEND_CONFIG['backend']
+    if name == 'openai':
+        return OpenAIAsyncBackend(api_key or API_CONFIG['api_key'], **options)
+    if name == 'google':
+        return GoogleTranslatorBackend(**options)
+    if name == 'mock':
+        # Read at call time so that BACKEND_CONFIG['mock'] changes made after import (benchmarks) apply
+        return MockBackend(**{**BACKEND_CONFIG['mock'], **options})
+    if name == 'router':
+        return RouterBackend(create_backend(BACKEND_CONFIG['router']['fast'], api_key),
+                             create_backend(BACKEND_CONFIG['router']['quality'], api_key), **options)
+    raise ValueError(f"Unknown translation backend: {name}")
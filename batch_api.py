@@ -0,0 +1,183 @@
+import os
+import json
+import logging
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+from config import API_CONFIG, BATCH_API_CONFIG
+from checkpoint import content_hash
+from chunker import chunk_all
+from masking import mask_all
+from prefilter import untranslatable
+from backends import build_messages, estimate_chat_tokens
+from parallel import parallel_map
+from columnar import read_table, write_table
+from translation_memory import TranslationMemory, open_translation_memory
+from translation_engine import AsyncTranslationEngine, TranslationBackend
+from HTML_in_CSV_Processor import HTMLProcessor
+from translator import (TRANSLATABLE_TYPES, default_target_languages, translate_deduplicated_targets,
+                        translate_targets)
+
+logger = logging.getLogger('website_translator')
+
+
+def custom_id(segment: str, target_language: str) -> str:
+    """Stable ID of one batch request: the same segment and language always map to the same ID."""
+    return f"{target_language}-{content_hash(segment)}"
+
+
+def batch_segments(values: Sequence[str]) -> List[str]:
+    """The masked, chunked segments translate_targets would send for values, in the same form."""
+    masked = mask_all(values)
+    chunked = chunk_all([item.text for item in masked])
+    skipped = untranslatable(masked, chunked, estimate_chat_tokens)
+    return [chunk for index, chunks in enumerate(chunked) if index not in skipped for chunk in chunks]
+
+
+def batch_request(segment: str, target_language: str) -> Dict:
+    """One line of a batch-API input file: a chat completion request for a single segment."""
+    return {
+        "custom_id": custom_id(segment, target_language),
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": API_CONFIG['model'],
+            "messages": build_messages(segment, target_language),
+            "temperature": API_CONFIG['temperature'],
+            "max_tokens": API_CONFIG['max_tokens'],
+        },
+    }
+
+
+def write_batch_requests(segments: Sequence[str], target_languages: Sequence[str], requests_path: str,
+                         memory: Optional[TranslationMemory] = None,
+                         max_requests: int = BATCH_API_CONFIG['max_requests_per_file']) -> List[str]:
+    """
+    Writes one request per distinct (segment, language) not already in the translation memory,
+    split into files of at most max_requests lines (requests.jsonl, requests_002.jsonl, ...).
+    Returns the written paths.
+    """
+    requests = []
+    seen = set()
+    for target_language in target_languages:
+        for segment in segments:
+            request_id = custom_id(segment, target_language)
+            if request_id in seen:
+                continue
+            seen.add(request_id)
+            if memory is not None and memory.get(segment, 'tr', target_language, API_CONFIG['model']) is not None:
+                continue
+            requests.append(batch_request(segment, target_language))
+
+    directory = os.path.dirname(requests_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, extension = os.path.splitext(requests_path)
+    paths = []
+    for number, start in enumerate(range(0, len(requests), max_requests), start=1):
+        path = requests_path if number == 1 else f"{root}_{number:03d}{extension}"
+        with open(path, 'w', encoding='utf-8') as batch_file:
+            for request in requests[start:start + max_requests]:
+                batch_file.write(json.dumps(request, ensure_ascii=False) + '\n')
+        paths.append(path)
+    logger.info(f"Wrote {len(requests)} batch requests to {len(paths)} file(s).")
+    return paths
+
+
+def read_batch_output(paths: Sequence[str]) -> Dict[str, str]:
+    """
+    Reads batch-API output (or error) JSONL files into {custom_id: translation}. Failed requests
+    map to 'ERROR: ...' so they surface like any other failed translation.
+    """
+    results = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as output_file:
+            for line in output_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                body = response.get('body') or {}
+                if record.get('error') or response.get('status_code', 200) != 200 or 'choices' not in body:
+                    error = record.get('error') or body.get('error') or f"status {response.get('status_code')}"
+                    if isinstance(error, dict):
+                        error = error.get('message', error)
+                    results[record['custom_id']] = f"ERROR: {error}"
+                else:
+                    results[record['custom_id']] = body['choices'][0]['message']['content'].strip()
+    return results
+
+
+class BatchResultBackend(TranslationBackend):
+    """Answers translation requests from batch-API output instead of calling the API."""
+    name = API_CONFIG['model']  # Same memory namespace as the realtime OpenAI backend
+
+    def __init__(self, results: Dict[str, str]):
+        self.results = results
+
+    async def translate(self, content: str, target_language: str) -> str:
+        translated = self.results.get(custom_id(content, target_language))
+        if translated is None:
+            raise KeyError(f"{custom_id(content, target_language)} is not in the batch output")
+        if translated.startswith("ERROR:"):
+            raise RuntimeError(translated[len("ERROR: "):])
+        return translated
+
+
+def _translatable_values(input_csv: str, processor: HTMLProcessor, columns: Optional[Sequence[str]] = None,
+                         content_types: Optional[Sequence[str]] = None):
+    df = read_table(input_csv, columns, content_types)
+    if "VALUE" not in df.columns:
+        raise ValueError("CSV is missing the 'VALUE' column.")
+    df["VALUE"] = parallel_map(processor.normalize_html, df["VALUE"].tolist())
+    return df, df["CONTENT_TYPE"].isin(TRANSLATABLE_TYPES)
+
+
+def build_batch_job(input_csv: str, requests_path: str = BATCH_API_CONFIG['requests_path'],
+                    target_languages: Optional[Sequence[str]] = None) -> List[str]:
+    """Serializes the deduplicated, masked segments of a classified CSV into batch-API request files."""
+    target_languages = list(target_languages or default_target_languages())
+    # Only translatable VALUEs are needed here; columnar input skips the other columns and rows while reading
+    df, translatable = _translatable_values(input_csv, HTMLProcessor(), ["VALUE", "CONTENT_TYPE"],
+                                            TRANSLATABLE_TYPES)
+    segments = batch_segments(list(df.loc[translatable, "VALUE"].unique()))
+    memory = open_translation_memory()
+    try:
+        paths = write_batch_requests(segments, target_languages, requests_path, memory)
+    finally:
+        if memory is not None:
+            memory.close()
+    print(f"📦 Batch job for {len(segments)} segments x {len(target_languages)} languages written to {paths}")
+    return paths
+
+
+def ingest_batch_output(input_csv: str, output_paths: Sequence[str], output_csv: str,
+                        target_languages: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Merges batch-API output back into the CSV through the normal unmask/stitch/reconstruct path.
+    Segments missing from the output (or whose masked reply needs the unmasked fallback) come back
+    as 'ERROR: ...'; finished translations are stored in the translation memory.
+    """
+    target_languages = list(target_languages or default_target_languages())
+    processor = HTMLProcessor()
+    df, translatable = _translatable_values(input_csv, processor)
+
+    memory = open_translation_memory()
+    # Nothing goes over the network, so the rate limits are effectively off and retries pointless
+    engine = AsyncTranslationEngine(BatchResultBackend(read_batch_output(output_paths)), memory=memory,
+                                    requests_per_minute=1e9, tokens_per_minute=1e12, max_retries=0)
+    translated = translate_deduplicated_targets(
+        df.loc[translatable, "VALUE"],
+        lambda values, languages: translate_targets(values, engine, languages, processor),
+        target_languages
+    )
+    for language in target_languages:
+        column = f"VALUE_{language}"
+        df[column] = df["VALUE"]
+        df.loc[translatable, column] = translated[language]
+
+    write_table(df, output_csv)
+    print(f"✅ Batch results merged and saved to {output_csv}")
+    engine.close()
+    if memory is not None:
+        memory.close()
+    return df
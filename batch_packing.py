@@ -0,0 +1,76 @@
+import json
+import logging
+from typing import Callable, Dict, List, Sequence
+
+logger = logging.getLogger('website_translator')
+
+# JSON quoting and the "sN": key add a few tokens per packed segment
+SEGMENT_OVERHEAD_TOKENS = 8
+
+
+def segment_id(position: int) -> str:
+    """ID of the segment at position within its batch."""
+    return f"s{position}"
+
+
+def pack_segments(contents: Sequence[str], estimate_tokens: Callable[[str], int], token_budget: int,
+                  max_segments: int) -> List[List[int]]:
+    """
+    Greedily groups content indices into batches whose estimated reply stays within token_budget.
+    A segment larger than the budget on its own still gets a batch of one.
+    """
+    batches = []
+    current = []
+    used = 0
+    for index, content in enumerate(contents):
+        tokens = estimate_tokens(content) + SEGMENT_OVERHEAD_TOKENS
+        if current and (used + tokens > token_budget or len(current) >= max_segments):
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(index)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_messages(segments: Dict[str, str], target_language: str) -> List[Dict[str, str]]:
+    """Builds chat messages asking for every labelled segment to be translated into a JSON object."""
+    prompt = f"""
+        You are a professional translator. Translate each Turkish HTML segment in the JSON object below into {target_language}.
+        - Preserve all HTML tags and formatting.
+        - Only translate readable text within the tags.
+        - Do NOT alter or remove any tags.
+        - Keep every [[n]] placeholder exactly as written; each stands for markup.
+        - Reply with a JSON object that has exactly the same keys, each mapped to its translated segment.
+
+        Segments:
+        {json.dumps(segments, ensure_ascii=False)}
+        """
+
+    return [
+        {"role": "system",
+         "content": "You are an AI trained for preserving HTML structures while translating content. "
+                    "You always reply with valid JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_batch_reply(reply: str, expected_ids: Sequence[str]) -> Dict[str, str]:
+    """
+    Extracts {id: translation} from a packed reply. IDs that are missing, not strings or
+    unknown are left out so the caller can retry those segments individually.
+    """
+    try:
+        data = json.loads(reply)
+    except (TypeError, ValueError):
+        logger.error("Packed reply is not valid JSON.")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    expected = set(expected_ids)
+    # Some models wrap the mapping in a single top-level key
+    if len(data) == 1 and not set(data) & expected and isinstance(next(iter(data.values())), dict):
+        data = next(iter(data.values()))
+    return {key: value.strip() for key, value in data.items() if key in expected and isinstance(value, str)}
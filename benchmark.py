@@ -0,0 +1,232 @@
+"""
+Benchmarks for the HTML processing and translation pipeline.
+
+Micro-benchmarks time the per-cell functions on synthetic corpora; macro-benchmarks run the CSV
+translation pipeline end to end against the mock backend. Results (rows/sec, p50/p99 latency per
+cell, peak RSS) are written as JSON so runs on different commits can be compared:
+
+    python benchmark.py --rows 2000 --output .html_processor/benchmarks/latest.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from typing import Callable, Dict, List, Sequence
+from config import BACKEND_CONFIG, CACHE_CONFIG, TRANSLATION_CONFIG
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+WORDS = ["merhaba", "dünya", "oyun", "bonus", "kazanç", "şans", "güvenli", "hızlı", "ödeme", "casino",
+         "slot", "büyük", "ödül", "yeni", "üye", "çekim", "yatırım", "canlı", "destek", "kampanya"]
+INLINE_TAGS = ["b", "i", "strong", "em", "span", "a"]
+BLOCK_TAGS = ["div", "section", "article", "p", "ul", "li", "table", "header"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def plain_text(rng: random.Random) -> str:
+    return " ".join(_sentence(rng, rng.randint(4, 14)) for _ in range(rng.randint(1, 4)))
+
+
+def rich_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 6)):
+        tag = rng.choice(INLINE_TAGS)
+        attributes = ' href="https://example.com/x"' if tag == "a" else ''
+        parts.append(f"{_sentence(rng, rng.randint(3, 8))} <{tag}{attributes}>{rng.choice(WORDS)}</{tag}>")
+        if rng.random() < 0.3:
+            parts.append("<br>")
+    return f"<p>{' '.join(parts)}</p>"
+
+
+def full_html(rng: random.Random, depth: int = 8) -> str:
+    """Deeply nested block structure with inline markup, comments and entities at the leaves."""
+    if depth == 0:
+        return f"{rich_text(rng)}<!-- note -->&nbsp;"
+    tag = rng.choice(BLOCK_TAGS)
+    children = "".join(full_html(rng, depth - 1) for _ in range(rng.choice((1, 1, 2))))
+    return f'<{tag} class="c{depth}" style="margin:0">{children}</{tag}>'
+
+
+def huge_cell(rng: random.Random, size: int = 100000) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        part = f"<div><h2>{_sentence(rng, 4)}</h2>{rich_text(rng)}<br><br></div>"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+CORPORA: Dict[str, Callable[[random.Random], str]] = {
+    "plain_text": plain_text,
+    "rich_text": rich_text,
+    "full_html": full_html,
+    "huge_cell": huge_cell,
+}
+
+
+def make_corpus(kind: str, rows: int, seed: int) -> List[str]:
+    rng = random.Random(f"{seed}-{kind}")
+    if kind == "huge_cell":
+        rows = max(1, rows // 200)  # Each cell is ~100k characters
+    return [CORPORA[kind](rng) for _ in range(rows)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(latencies: List[float], rows: int, total: float) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "rows": rows,
+        "seconds": round(total, 4),
+        "rows_per_sec": round(rows / total, 1) if total else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4) if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def time_per_cell(func: Callable, cells: Sequence) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for cell in cells:
+        began = time.perf_counter()
+        func(cell)
+        latencies.append(time.perf_counter() - began)
+    return summarize(latencies, len(cells), time.perf_counter() - start)
+
+
+def micro_benchmarks(rows: int, seed: int) -> Dict[str, Dict]:
+    from HTML_in_CSV_Processor import HTMLProcessor
+    from content_classifier import classify_content
+
+    processor = HTMLProcessor()
+    results = {}
+    for kind in CORPORA:
+        cells = make_corpus(kind, rows, seed)
+        structures = [processor.extract_html_structure(cell) for cell in cells]
+        results[f"normalize_html/{kind}"] = time_per_cell(processor.normalize_html, cells)
+        results[f"extract_html_structure/{kind}"] = time_per_cell(processor.extract_html_structure, cells)
+        results[f"reconstruct_html_from_structure/{kind}"] = time_per_cell(
+            lambda pair: processor.reconstruct_html_from_structure(*pair), list(zip(structures, cells)))
+        results[f"classify_content/{kind}"] = time_per_cell(classify_content, cells)
+    return results
+
+
+def _write_corpus_csv(path: str, rows: int, seed: int):
+    import pandas as pd
+    from content_classifier import classify_content
+
+    rng = random.Random(seed)
+    kinds = ["plain_text", "rich_text", "rich_text", "full_html"]
+    generators = {kind: random.Random(f"{seed}-{kind}") for kind in kinds}
+    values = []
+    for _ in range(rows):
+        kind = rng.choice(kinds)
+        # Exports repeat a lot of content; reuse earlier cells so deduplication is exercised
+        values.append(rng.choice(values) if values and rng.random() < 0.3 else CORPORA[kind](generators[kind]))
+    df = pd.DataFrame({"KEY": [f"row-{index}" for index in range(rows)], "VALUE": values})
+    df["CONTENT_TYPE"] = df["VALUE"].apply(classify_content)
+    df.to_csv(path, index=False)
+
+
+def macro_benchmarks(rows: int, seed: int, latency: float) -> Dict[str, Dict]:
+    """
+    Runs the CSV translation pipelines end to end on the mock backend with the cache and journal off.
+    Latency percentiles are those of the translated segments (one per cell unless it was chunked).
+    """
+    from translator import process_translation_all
+    from pipeline import run_streaming
+    from metrics import METRICS
+
+    BACKEND_CONFIG['backend'] = 'mock'
+    BACKEND_CONFIG['mock'].update(latency=latency, latency_jitter=0.0, failure_rate=0.0, rate_limit_rate=0.0)
+    CACHE_CONFIG['enabled'] = False
+    TRANSLATION_CONFIG['recovery_mode'] = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        input_csv = os.path.join(directory, "input.csv")
+        _write_corpus_csv(input_csv, rows, seed)
+        for name, run in (("process_translation", lambda output: process_translation_all(input_csv, output, None)),
+                          ("streaming_pipeline", lambda output: run_streaming(input_csv, output, None))):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                run(os.path.join(directory, f"{name}.csv"))
+                total = time.perf_counter() - start
+            # The run resets METRICS when it starts, so the samples are this run's alone
+            results[name] = summarize(list(METRICS.samples.get('segment_seconds', [])), rows, total)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HTML processing and translation pipeline.")
+    parser.add_argument("--rows", type=int, default=2000, help="Cells per corpus (huge cells: rows / 200)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="Seconds per mock API request")
+    parser.add_argument("--skip-macro", action="store_true", help="Only run the per-function benchmarks")
+    parser.add_argument("--output", default=".html_processor/benchmarks/latest.json")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "micro": micro_benchmarks(args.rows, args.seed),
+    }
+    if not args.skip_macro:
+        report["macro"] = macro_benchmarks(args.rows, args.seed, args.mock_latency)
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+
+    for section in ("micro", "macro"):
+        for name, result in report.get(section, {}).items():
+            latency = ("n/a" if result['p50_ms'] is None
+                       else f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms")
+            print(f"{name:<50} {result['rows_per_sec'] or 0:>12.1f} rows/s  {latency}")
+    print(f"✅ Benchmark results saved to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+from config import TRANSLATION_CONFIG
+
+logger = logging.getLogger('website_translator')
+
+
+def content_hash(value: str) -> str:
+    return hashlib.sha256(str(value).encode('utf-8')).hexdigest()[:16]
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL record of finished row translations, keyed by row ID, content hash and
+    target language. A row whose content changed since it was journaled is translated again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[Tuple[str, str, Optional[str]], str] = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                        self.entries[(record['row'], record['hash'], record.get('lang'))] = record['translation']
+                    except (ValueError, KeyError):
+                        # A crash mid-write can leave a truncated last line
+                        logger.warning(f"Skipping unreadable checkpoint line in {path}")
+            logger.info(f"Loaded {len(self.entries)} finished rows from checkpoint {path}")
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def get(self, row, value: str, language: Optional[str] = None) -> Optional[str]:
+        return self.entries.get((str(row), content_hash(value), language))
+
+    def record(self, rows: Iterable[Tuple[object, str, str, Optional[str]]]):
+        """Appends (row, value, translation, language) records and flushes them to disk."""
+        lines = []
+        for row, value, translation, language in rows:
+            key = (str(row), content_hash(value), language)
+            self.entries[key] = translation
+            record = {'row': key[0], 'hash': key[1], 'translation': translation}
+            if language is not None:
+                record['lang'] = language
+            lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.writelines(lines)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def remove(self):
+        """Deletes the journal once the run's output has been written."""
+        self.close()
+        os.remove(self.path)
+
+
+def open_journal(output_path: str) -> Optional[CheckpointJournal]:
+    """Opens the checkpoint journal next to output_path when TRANSLATION_CONFIG['recovery_mode'] is on."""
+    if not TRANSLATION_CONFIG['recovery_mode']:
+        return None
+    return CheckpointJournal(f"{output_path}.journal.jsonl")
@@ -0,0 +1,164 @@
+import bisect
+import logging
+from typing import Callable, List, Optional, Sequence, Tuple
+from config import API_CONFIG, BATCH_CONFIG, LANGUAGE_CONFIG, TRANSLATION_CONFIG
+from html_tokenizer import tokenize, TAG_KINDS, TEXT
+from HTML_in_CSV_Processor import HTMLProcessor
+from html_structure import HTMLStructure
+from masking import PLACEHOLDER_RE
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate
+    tiktoken = None
+
+logger = logging.getLogger('website_translator')
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Counts model tokens with tiktoken when installed, else estimates ~4 characters per token."""
+    global _encoding
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(API_CONFIG['model'])
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def _unsplittable_spans(content: str) -> List[Tuple[int, int]]:
+    """Sorted (start, end) spans of the tags and [[n]] placeholders of content, which a chunk never cuts."""
+    spans = []
+    for token in tokenize(content):
+        if token.kind in TAG_KINDS:
+            spans.append((token.start, token.end))
+        elif token.kind == TEXT:
+            spans.extend((token.start + match.start(), token.start + match.end())
+                         for match in PLACEHOLDER_RE.finditer(token.text))
+    return spans
+
+
+def _inside_tag(position: int, spans: List[Tuple[int, int]]) -> bool:
+    index = bisect.bisect_left(spans, (position,)) - 1
+    return index >= 0 and spans[index][1] > position
+
+
+def _split_point(content: str, start: int, limit: int, spans: List[Tuple[int, int]]) -> int:
+    """
+    Picks where the chunk starting at start should end, at most at limit. Separators are tried in
+    LANGUAGE_CONFIG['text_separators'] order within the last separator_window characters before
+    limit, then within the last 1/separator_window_parting of the chunk. Tag separators split
+    before the tag, text separators after themselves, and no split ever lands inside a tag or a
+    placeholder (spans).
+    """
+    windows = [max(start + 1, limit - TRANSLATION_CONFIG['separator_window']),
+               max(start + 1, limit - (limit - start) // TRANSLATION_CONFIG['separator_window_parting'])]
+    for window_start in windows:
+        for separator in LANGUAGE_CONFIG['text_separators']:
+            position = content.rfind(separator, window_start, limit)
+            while position != -1:
+                split = position if separator.startswith('<') else position + len(separator)
+                if start < split <= limit and not _inside_tag(split, spans):
+                    return split
+                position = content.rfind(separator, window_start, position)
+    # No separator: fall back to the last tag or placeholder boundary, then to the hard limit
+    index = bisect.bisect_right(spans, (limit, len(content) + 1)) - 1
+    if index >= 0 and spans[index][0] > start:
+        return spans[index][0]
+    if _inside_tag(limit, spans):
+        return spans[bisect.bisect_left(spans, (limit,)) - 1][1]  # Overshoot rather than cut a tag or placeholder
+    return limit
+
+
+def chunk_html(content: str, max_chars: int = TRANSLATION_CONFIG['chunk_max_size'],
+               max_tokens: Optional[int] = None) -> List[str]:
+    """
+    Splits an oversized cell into chunks of at most max_chars characters whose token count fits
+    the reply budget, cutting at configured separators along tag boundaries.
+    """
+    if max_tokens is None:
+        max_tokens = int(API_CONFIG['max_tokens'] * BATCH_CONFIG['budget_fraction'])
+    if len(content) <= max_chars and count_tokens(content) <= max_tokens:
+        return [content]
+
+    spans = _unsplittable_spans(content)
+    chunks = []
+    start = 0
+    while start < len(content):
+        limit = min(len(content), start + max_chars)
+        while True:
+            end = limit if limit == len(content) else _split_point(content, start, limit, spans)
+            if count_tokens(content[start:end]) <= max_tokens or limit - start <= 1:
+                break
+            # Too many tokens for the character limit (e.g. dense non-Latin text): shrink and retry
+            limit = start + (limit - start) * 3 // 4
+        chunks.append(content[start:end])
+        start = end
+    return chunks
+
+
+def stitch_chunks(original_structure: HTMLStructure, translated_chunks: Sequence[str]) -> Tuple[str, bool]:
+    """
+    Joins translated chunks, walking them through validate_html_structure with the running
+    position and leftover text. Returns the joined translation and whether every chunk matched.
+    """
+    position = 0
+    leftover = ""
+    valid = True
+    for chunk in translated_chunks:
+        translated_structure = HTMLProcessor.extract_html_structure(leftover + chunk)
+        if not translated_structure:
+            continue
+        new_position, _ = HTMLProcessor.validate_html_structure(original_structure, chunk, position, leftover)
+        if new_position == position and any(translated_structure.kinds):
+            valid = False
+        position = new_position
+        # Trailing text continues into the next chunk, so it is compared together with it
+        leftover = "" if translated_structure[-1][1] else translated_structure[-1][0]
+    return "".join(translated_chunks), valid
+
+
+def chunk_all(contents: Sequence[str]) -> List[List[str]]:
+    """Chunks every content; a content that fits comes back as a single chunk."""
+    chunked = [chunk_html(content) for content in contents]
+    chunk_count = sum(len(chunks) for chunks in chunked)
+    if chunk_count > len(contents):
+        logger.info(f"Split {len(contents)} cells into {chunk_count} chunks.")
+    return chunked
+
+
+def stitch_all(contents: Sequence[str], chunked: Sequence[List[str]], translated: Sequence[str]) -> List[str]:
+    """
+    Stitches the flat list of translated chunks back into one translation per content. An error
+    in any chunk makes the whole content that error.
+    """
+    results = []
+    offset = 0
+    for content, chunks in zip(contents, chunked):
+        parts = translated[offset:offset + len(chunks)]
+        offset += len(chunks)
+        errors = [part for part in parts if part.startswith("ERROR:")]
+        if errors:
+            results.append(errors[0])
+            continue
+        if len(parts) == 1:
+            results.append(parts[0])
+            continue
+        stitched, valid = stitch_chunks(HTMLProcessor.extract_html_structure(content), parts)
+        if not valid:
+            logger.error(f"Chunked translation structure mismatch: {HTMLProcessor.truncate_str(content)}")
+        results.append(stitched)
+    return results
+
+
+def translate_chunked(contents: Sequence[str], translate_many: Callable[[List[str]], List[str]]) -> List[str]:
+    """
+    Chunks every oversized content, translates all chunks of all contents in one translate_many
+    call (so they run concurrently) and stitches each content back together.
+    """
+    chunked = chunk_all(contents)
+    return stitch_all(contents, chunked, translate_many([chunk for chunks in chunked for chunk in chunks]))
@@ -0,0 +1,148 @@
+"""
+Command-line entry point for the classify -> filter -> process/translate workflow:
+
+    python cli.py classify export.csv classified.parquet
+    python cli.py filter classified.parquet filtered.parquet
+    python cli.py process filtered.parquet processed.parquet
+    python cli.py translate filtered.parquet translated.csv --languages EN DE
+    python cli.py run-all export.csv translated.csv --format parquet
+    python cli.py check-api
+
+Only config and the standard library are imported up front; pandas, bs4, openai and the
+translation modules are imported by the subcommand that needs them, so short jobs and health
+checks start quickly.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from config import API_CONFIG, BACKEND_CONFIG, INTERMEDIATE_CONFIG, LOGGING_CONFIG
+
+
+def classify(args):
+    from content_classifier import process_csv
+    process_csv(args.input, args.output)
+
+
+def filter_rows(args):
+    from content_classifier import filter_content
+    filter_content(args.input, args.output)
+
+
+def process(args):
+    from HTML_in_CSV_Processor import HTMLProcessor
+    HTMLProcessor().process_csv(args.input, args.output, args.columns, args.workers)
+
+
+def translate(args, input_path=None):
+    input_path = input_path or args.input
+    if args.streaming:
+        from pipeline import run_streaming
+        run_streaming(input_path, args.output, args.api_key, args.languages, previous_output=args.previous)
+    else:
+        from translator import process_translation_all
+        process_translation_all(input_path, args.output, args.api_key, args.languages,
+                                split_files=args.split_files, previous_output=args.previous)
+
+
+def run_all(args):
+    """Classifies and filters into intermediates under --work-dir, then translates the filtered rows."""
+    from columnar import intermediate_path
+    from content_classifier import filter_content, process_csv
+
+    root = os.path.splitext(os.path.basename(args.input))[0]
+    classified = intermediate_path(os.path.join(args.work_dir, f"classified_{root}.csv"), args.format)
+    filtered = intermediate_path(os.path.join(args.work_dir, f"filtered_{root}.csv"), args.format)
+    process_csv(args.input, classified)
+    filter_content(classified, filtered)
+    translate(args, filtered)
+
+
+def check_api(args):
+    """Lists the models the API key can use, like entry.py, over plain HTTP (no openai import)."""
+    from urllib.error import URLError
+    from urllib.request import Request, urlopen
+
+    base_url = (API_CONFIG.get('base_url') or "https://api.openai.com/v1").rstrip("/")
+    request = Request(f"{base_url}/models", headers={"Authorization": f"Bearer {args.api_key}"})
+    try:
+        with urlopen(request, timeout=args.timeout) as response:
+            models = [model["id"] for model in json.load(response)["data"]]
+    except (URLError, OSError, ValueError, KeyError) as e:
+        print(f"❌ OpenAI API Error: {e}")
+        return 1
+    print("✅ API Connection Successful! Available models:", models)
+    return 0
+
+
+def _add_translate_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--languages", nargs="+", type=str.upper, default=None,
+                        help="Target language codes (default: LANGUAGE_CONFIG['languages'])")
+    parser.add_argument("--backend", choices=("openai", "google", "mock", "router"), default=None,
+                        help="Translation backend (default: BACKEND_CONFIG['backend'])")
+    parser.add_argument("--previous", default=None,
+                        help="Translated output of an earlier export; unchanged rows are carried forward")
+    parser.add_argument("--split-files", action="store_true", help="Also write one <output>_<LANG>.csv per language")
+    parser.add_argument("--streaming", action="store_true", help="Translate in bounded-memory row chunks")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Classify, process and translate HTML content in CSV exports.")
+    parser.add_argument("--api-key", default=os.getenv("OPENAI_API_KEY") or API_CONFIG['api_key'],
+                        help="OpenAI API key (default: $OPENAI_API_KEY, then API_CONFIG['api_key'])")
+    parser.add_argument("--log-level", default=LOGGING_CONFIG['level'])
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    command = subcommands.add_parser("classify", help="Add a CONTENT_TYPE column to an export")
+    command.add_argument("input")
+    command.add_argument("output")
+    command.set_defaults(handler=classify)
+
+    command = subcommands.add_parser("filter", help="Keep the translation-relevant content types")
+    command.add_argument("input")
+    command.add_argument("output")
+    command.set_defaults(handler=filter_rows)
+
+    command = subcommands.add_parser("process", help="Normalize HTML columns and extract their translatable text")
+    command.add_argument("input")
+    command.add_argument("output")
+    command.add_argument("--columns", nargs="+", default=["VALUE"], help="HTML columns to process")
+    command.add_argument("--workers", type=int, default=None, help="Worker processes (default: PARALLEL_CONFIG)")
+    command.set_defaults(handler=process)
+
+    command = subcommands.add_parser("translate", help="Translate a classified (filtered) table")
+    command.add_argument("input")
+    command.add_argument("output")
+    _add_translate_options(command)
+    command.set_defaults(handler=translate)
+
+    command = subcommands.add_parser("run-all", help="classify -> filter -> translate an export")
+    command.add_argument("input")
+    command.add_argument("output")
+    command.add_argument("--work-dir", default=".html_processor/CSVs", help="Directory for the intermediates")
+    command.add_argument("--format", choices=("csv", "parquet", "arrow"), default=INTERMEDIATE_CONFIG['format'],
+                         help="Intermediate file format (parquet/arrow need pyarrow)")
+    _add_translate_options(command)
+    command.set_defaults(handler=run_all)
+
+    command = subcommands.add_parser("check-api", help="Check the API key by listing the available models")
+    command.add_argument("--timeout", type=float, default=10.0)
+    command.set_defaults(handler=check_api)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level, format=LOGGING_CONFIG['format'], datefmt=LOGGING_CONFIG['datefmt'])
+    if getattr(args, "backend", None):
+        BACKEND_CONFIG['backend'] = args.backend
+    start = time.perf_counter()
+    status = args.handler(args)
+    logging.getLogger('website_translator').info(f"{args.command} finished in {time.perf_counter() - start:.1f}s")
+    return status or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
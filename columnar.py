@@ -0,0 +1,128 @@
+import os
+import logging
+import pandas as pd
+from typing import Iterator, List, Optional, Sequence
+from config import INTERMEDIATE_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only the Parquet/Arrow intermediates need it
+    pa = None
+
+logger = logging.getLogger('website_translator')
+
+# File suffix -> table format; anything else is read and written as CSV
+TABLE_FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+_FORMAT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def table_format(path: str) -> str:
+    """'parquet', 'arrow' or 'csv', from the file suffix."""
+    return TABLE_FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def intermediate_path(path: str, table_format: str = INTERMEDIATE_CONFIG['format']) -> str:
+    """path with its suffix replaced by the configured intermediate format's (e.g. x.csv -> x.parquet)."""
+    return os.path.splitext(path)[0] + _FORMAT_SUFFIXES[table_format]
+
+
+def _require_pyarrow(path: str):
+    if pa is None:
+        raise ImportError(f"pyarrow is required to read or write {path}; install it or use CSV intermediates.")
+
+
+def _read_arrow(path: str, columns: Optional[Sequence[str]], content_types: Optional[Sequence[str]]):
+    """Memory-maps an Arrow IPC file; only the selected columns and rows are copied out of the map."""
+    table = feather.read_table(path, memory_map=True)
+    if content_types is not None:
+        table = table.filter(pc.is_in(table.column("CONTENT_TYPE"), value_set=pa.array(list(content_types))))
+    return table.select(list(columns)) if columns is not None else table
+
+
+def table_columns(path: str) -> List[str]:
+    """Column names of a CSV, Parquet or Arrow table, read from its header or schema only."""
+    file_format = table_format(path)
+    if file_format == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    _require_pyarrow(path)
+    if file_format == 'parquet':
+        return list(pq.read_schema(path).names)
+    with pa.memory_map(path) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def read_table(path: str, columns: Optional[Sequence[str]] = None,
+               content_types: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Reads a CSV, Parquet or Arrow table, keeping only columns (when given) and the rows whose
+    CONTENT_TYPE is in content_types (when given). Parquet and Arrow files are memory-mapped, and
+    Parquet pushes the content-type filter down so row groups without those types are skipped.
+    """
+    file_format = table_format(path)
+    if file_format == 'csv':
+        usecols = None
+        if columns is not None:
+            usecols = list(columns) + (["CONTENT_TYPE"] if content_types is not None
+                                       and "CONTENT_TYPE" not in columns else [])
+        df = pd.read_csv(path, usecols=usecols)
+        if content_types is not None:
+            df = df[df["CONTENT_TYPE"].isin(content_types)]
+        return df[list(columns)] if columns is not None else df
+
+    _require_pyarrow(path)
+    if file_format == 'parquet':
+        filters = [("CONTENT_TYPE", "in", list(content_types))] if content_types is not None else None
+        table = pq.read_table(path, columns=list(columns) if columns is not None else None, filters=filters,
+                              memory_map=True)
+    else:
+        table = _read_arrow(path, columns, content_types)
+    return table.to_pandas()
+
+
+def iter_table(path: str, chunksize: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Reads a table chunksize rows at a time, like pd.read_csv(chunksize=...): chunk indexes continue
+    from one chunk to the next, so index labels are row positions in the file.
+    """
+    if table_format(path) == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=list(columns) if columns is not None else None)
+        return
+
+    _require_pyarrow(path)
+    if table_format(path) == 'parquet':
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(
+            batch_size=chunksize, columns=list(columns) if columns is not None else None)
+        tables = (pa.Table.from_batches([batch]) for batch in batches)
+    else:
+        table = _read_arrow(path, columns, None)
+        tables = (table.slice(start, chunksize) for start in range(0, table.num_rows, chunksize))
+    start = 0
+    for table in tables:
+        chunk = table.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def write_table(df: pd.DataFrame, path: str):
+    """
+    Writes df as CSV, Parquet or Arrow depending on the suffix of path. Arrow files are written
+    uncompressed so that readers can memory-map them without decoding.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_format = table_format(path)
+    if file_format == 'csv':
+        df.to_csv(path, index=False)
+        return
+
+    _require_pyarrow(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if file_format == 'parquet':
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression='uncompressed')
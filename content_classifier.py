@@ -1,6 +1,6 @@
 import pandas as pd
-import re
-from bs4 import BeautifulSoup
+from columnar import intermediate_path, read_table, write_table
+from html_tokenizer import start_tag_names
 
 # HTML Tag Categories
 RICH_TEXT_TAGS = {
@@ -16,6 +16,10 @@ FULL_HTML_TAGS = {
 
 CSS_JS_TAGS = {"style", "script"}
 
+# Content types kept by filter_content for translation
+RELEVANT_CONTENT_TYPES = ['RICH_TEXT', 'FULL_HTML', 'CSS/JS', 'UNKNOWN']
+
+
 def classify_content(text):
     """
     Classifies text content into categories:
@@ -24,45 +28,42 @@ def classify_content(text):
     - FULL_HTML: Structured HTML (e.g., <div>, <table>, <section>).
     - CSS/JS: Contains <style> or <script>.
     - UNKNOWN: If it doesn’t fit neatly into any category.
+
+    Scans start tag names once (html_tokenizer.start_tag_names) and stops at the first
+    <style>/<script>; labels match the BeautifulSoup classifier this replaced (see tests).
     """
     if pd.isna(text) or not text.strip():
         return "EMPTY"
 
-    soup = BeautifulSoup(text, "html.parser")
-
-    # Identify CSS/JS content
-    if any(tag.name in CSS_JS_TAGS for tag in soup.find_all()):
-        return "CSS/JS"
-
-    # Identify FULL_HTML (heavy structure)
-    if any(tag.name in FULL_HTML_TAGS for tag in soup.find_all()):
+    has_full_html = has_rich_text = has_tags = False
+    for name in start_tag_names(text):
+        if name in CSS_JS_TAGS:
+            return "CSS/JS"
+        has_tags = True
+        if name in FULL_HTML_TAGS:
+            has_full_html = True
+        elif name in RICH_TEXT_TAGS or name == "img":
+            has_rich_text = True
+
+    if has_full_html:
         return "FULL_HTML"
-
-    # Identify RICH_TEXT (inline formatting and readable text)
-    if any(tag.name in RICH_TEXT_TAGS for tag in soup.find_all()):
-        return "RICH_TEXT"
-
-    # If it's only an image or a simple tag, classify as rich text
-    if soup.find("img") or soup.find("hr") or soup.find("br"):
+    if has_rich_text:
         return "RICH_TEXT"
-
-    # If it has no recognizable HTML, it's plain text
-    if not soup.find():
+    if not has_tags:
         return "PLAIN_TEXT"
-
     return "UNKNOWN"
 
 
 def process_csv(input_csv, output_csv):
-    """Loads a CSV, classifies the VALUE column, and saves results."""
-    df = pd.read_csv(input_csv)
+    """Loads a CSV, classifies the VALUE column, and saves results (as CSV, Parquet or Arrow by suffix)."""
+    df = read_table(input_csv)
 
     if "VALUE" not in df.columns:
         raise ValueError("CSV is missing the 'VALUE' column.")
 
     print(f"Processing {len(df)} rows...")
     df["CONTENT_TYPE"] = df["VALUE"].apply(classify_content)
-    df.to_csv(output_csv, index=False)
+    write_table(df, output_csv)
     print(f"✅ Processed and saved to {output_csv}")
 
     return df
@@ -70,28 +71,24 @@ def process_csv(input_csv, output_csv):
 
 def filter_content(input_csv, output_filtered_csv):
     """Filters classified data for translation-relevant content types."""
-    df = pd.read_csv(input_csv)
-
-    # Select only the necessary content types
-    filtered_df = df[df['CONTENT_TYPE'].isin(['RICH_TEXT', 'FULL_HTML', 'CSS/JS', 'UNKNOWN'])]
+    # Select only the necessary content types (pushed down into the reader for Parquet/Arrow input)
+    filtered_df = read_table(input_csv, content_types=RELEVANT_CONTENT_TYPES)
 
-    filtered_df.to_csv(output_filtered_csv, index=False)
+    write_table(filtered_df, output_filtered_csv)
     print(f"✅ Filtered content saved to {output_filtered_csv}")
 
     return filtered_df
 
-import pandas as pd
-from content_classifier import process_csv, filter_content
-
-# File paths
-input_file = "/Users/ashkanpirme.com/Downloads/Translations/Source CSV Files to be translated/DISCOUNTCASINO.COM-TUR-2025_02_07-12_53_21.csv"  # Change this to your actual file
-classified_output_file = ".html_processor/CSVs/classified_output_discount_casion_02.csv"
-filtered_output_file = ".html_processor/CSVs/filtered_classified_output_discount_casion_02.csv"
-
-# Step 1: Classify the content
-df = process_csv(input_file, classified_output_file)
 
-# Step 2: Filter the classified content
-filtered_df = filter_content(classified_output_file, filtered_output_file)
+if __name__ == "__main__":
+    # File paths
+    input_file = "/Users/ashkanpirme.com/Downloads/Translations/Source CSV Files to be translated/DISCOUNTCASINO.COM-TUR-2025_02_07-12_53_21.csv"  # Change this to your actual file
+    # Intermediates use INTERMEDIATE_CONFIG['format'] (e.g. .parquet); the source CSV is read as is
+    classified_output_file = intermediate_path(".html_processor/CSVs/classified_output_discount_casion_02.csv")
+    filtered_output_file = intermediate_path(".html_processor/CSVs/filtered_classified_output_discount_casion_02.csv")
 
+    # Step 1: Classify the content
+    df = process_csv(input_file, classified_output_file)
 
+    # Step 2: Filter the classified content
+    filtered_df = filter_content(classified_output_file, filtered_output_file)
@@ -0,0 +1,215 @@
+import re
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from html_tokenizer import markup_spans, tag_name, token_spans, Token, TAG_OPEN, TAG_CLOSE, TAG_SELF_CLOSING, COMMENT, TEXT_KINDS, STRAY
+
+# Item kinds stored in HTMLStructure.kinds; every kind except KIND_TEXT is a tag
+KIND_TEXT = 0
+KIND_OPEN = 1
+KIND_CLOSE = 2
+KIND_SELF_CLOSING = 3
+KIND_COMMENT = 4
+_KIND_CODES = {TAG_OPEN: KIND_OPEN, TAG_CLOSE: KIND_CLOSE, TAG_SELF_CLOSING: KIND_SELF_CLOSING, COMMENT: KIND_COMMENT}
+
+# Tag-name IDs used in signatures, assigned on first sight (process-local)
+_TAG_IDS = {None: 0}
+
+# validate_html_structure compares tags on re.split(r'[\s>]', tag)[0].lower(), i.e. this prefix
+_TAG_KEY_RE = re.compile(r'[^\s>]*')
+
+# [[n]] placeholders of masked content, checked in the text between tags while a reply streams in
+_PLACEHOLDER_RE = re.compile(r'\[\[\d+\]\]')
+
+
+class HTMLStructure(Sequence):
+    """
+    extract_html_structure result stored as parallel start/end/kind arrays of offsets into the
+    source string instead of a list of [item, is_tag, end] lists. Indexing still returns the
+    legacy [item, is_tag, end] list, slicing the item from the source only when asked for.
+    """
+    __slots__ = ('content', 'starts', 'ends', 'kinds')
+
+    def __init__(self, content: str, starts: array = None, ends: array = None, kinds: array = None):
+        self.content = content
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+        self.kinds = kinds if kinds is not None else array('b')
+
+    @classmethod
+    def from_tokens(cls, content: str, tokens: Iterable[Token]) -> 'HTMLStructure':
+        """Same items as html_tokenizer.structure_from_tokens: adjacent text/entity tokens merge, stray '<' are skipped."""
+        structure = cls(content)
+        starts, ends, kinds = structure.starts, structure.ends, structure.kinds
+        text_start = text_end = -1
+        for token in tokens:
+            if token.kind in TEXT_KINDS:
+                if text_start != -1 and token.start == text_end:
+                    text_end = token.end
+                    continue
+                if text_start != -1 and content[text_start:text_end].strip():
+                    starts.append(text_start)
+                    ends.append(text_end)
+                    kinds.append(KIND_TEXT)
+                text_start, text_end = token.start, token.end
+                continue
+            if text_start != -1 and content[text_start:text_end].strip():
+                starts.append(text_start)
+                ends.append(text_end)
+                kinds.append(KIND_TEXT)
+            text_start = -1
+            if token.kind != STRAY:
+                starts.append(token.start)
+                ends.append(token.end)
+                kinds.append(_KIND_CODES[token.kind])
+        if text_start != -1 and content[text_start:text_end].strip():
+            starts.append(text_start)
+            ends.append(text_end)
+            kinds.append(KIND_TEXT)
+        return structure
+
+    @classmethod
+    def parse(cls, content: str) -> 'HTMLStructure':
+        """Tokenizes content straight into the arrays; equal to from_tokens(content, tokenize(content))."""
+        structure = cls(content)
+        starts, ends, kinds = structure.starts, structure.ends, structure.kinds
+        text_start = text_end = -1
+        # Token spans are contiguous, so a text run simply continues until the next non-text token
+        for kind, start, end in token_spans(content):
+            if kind in TEXT_KINDS:
+                if text_start == -1:
+                    text_start = start
+                text_end = end
+                continue
+            if text_start != -1:
+                if content[text_start:text_end].strip():
+                    starts.append(text_start)
+                    ends.append(text_end)
+                    kinds.append(KIND_TEXT)
+                text_start = -1
+            if kind != STRAY:
+                starts.append(start)
+                ends.append(end)
+                kinds.append(_KIND_CODES[kind])
+        if text_start != -1 and content[text_start:text_end].strip():
+            starts.append(text_start)
+            ends.append(text_end)
+            kinds.append(KIND_TEXT)
+        return structure
+
+    @classmethod
+    def from_items(cls, items: Sequence[Sequence]) -> 'HTMLStructure':
+        """Converts a legacy [[item, is_tag(, end)], ...] list (tags keep the generic open kind)."""
+        if isinstance(items, HTMLStructure):
+            return items
+        structure = cls("".join(item[0] for item in items))
+        position = 0
+        for item in items:
+            structure.starts.append(position)
+            position += len(item[0])
+            structure.ends.append(position)
+            structure.kinds.append(KIND_OPEN if item[1] else KIND_TEXT)
+        return structure
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return HTMLStructure(self.content, self.starts[index], self.ends[index], self.kinds[index])
+        end = self.ends[index]
+        return [self.content[self.starts[index]:end], self.kinds[index] != KIND_TEXT, end]
+
+    def __repr__(self) -> str:
+        return f"HTMLStructure({self.to_list()!r})"
+
+    def to_list(self) -> List[List]:
+        """The legacy list-of-lists form."""
+        return [self[index] for index in range(len(self))]
+
+    def item(self, index: int) -> str:
+        return self.content[self.starts[index]:self.ends[index]]
+
+    def is_tag(self, index: int) -> bool:
+        return self.kinds[index] != KIND_TEXT
+
+    def tag_key(self, index: int) -> str:
+        """The tag up to its first whitespace or '>', lower-cased (e.g. '<p', '</a', '<br/')."""
+        return _TAG_KEY_RE.match(self.content, self.starts[index], self.ends[index]).group().lower()
+
+    def tags(self) -> Iterable[str]:
+        """The tag items in order."""
+        content, starts, ends = self.content, self.starts, self.ends
+        return (content[starts[index]:ends[index]] for index, kind in enumerate(self.kinds) if kind != KIND_TEXT)
+
+    def signature(self) -> bytes:
+        """
+        The tag sequence as packed (tag-name ID, kind) codes, ignoring text and attributes. Two
+        structures have the same tags in the same order exactly when their signatures are equal.
+        """
+        codes = array('I')
+        content, starts, ends = self.content, self.starts, self.ends
+        for index, kind in enumerate(self.kinds):
+            if kind == KIND_TEXT:
+                continue
+            name = tag_name(content[starts[index]:ends[index]]) if kind != KIND_COMMENT else None
+            tag_id = _TAG_IDS.get(name)
+            if tag_id is None:
+                tag_id = _TAG_IDS[name] = len(_TAG_IDS)
+            codes.append(tag_id << 3 | kind)
+        return codes.tobytes()
+
+
+def tag_signature(content: str) -> bytes:
+    """HTMLStructure.signature of content."""
+    return HTMLStructure.parse(content).signature()
+
+
+def _markers(content: str, start: int = 0) -> Iterator[Tuple[str, int]]:
+    """
+    (key, end) for each complete tag, comment and placeholder of content from start on, tags keyed
+    as in validate_html_structure. Stops at a tag or comment that is not closed yet.
+    """
+    position = start
+    for kind, tag_start, tag_end in markup_spans(content, start):
+        for match in _PLACEHOLDER_RE.finditer(content, position, tag_start):
+            yield match.group(), match.end()
+        if kind is None:
+            return
+        yield _TAG_KEY_RE.match(content, tag_start).group().lower(), tag_end
+        position = tag_end
+    for match in _PLACEHOLDER_RE.finditer(content, position):
+        yield match.group(), match.end()
+
+
+class StructureMonitor:
+    """
+    Checks a reply against its source while the reply is still arriving. Tags are compared on
+    the same keys as validate_html_structure, and placeholders must come back as written, all in
+    the source order. Markup is found with markup_spans, so a bare '<' in text ("x < y" for a
+    source's "x &lt; y") is text, and a tag split across deltas is checked once it is closed.
+    feed returns False as soon as a marker differs from the expected one, or one arrives beyond
+    the source's last; the reply can no longer validate, so it can be aborted.
+    """
+    __slots__ = ('expected', 'reply', 'matched', 'mismatch', '_scan')
+
+    def __init__(self, source: str):
+        self.expected = [key for key, _ in _markers(source)]
+        self.reply = ""
+        self.matched = 0
+        self.mismatch: Optional[str] = None
+        self._scan = 0  # Markers before this offset of the reply are already checked
+
+    def feed(self, delta: str) -> bool:
+        if self.mismatch is not None:
+            return False
+        self.reply += delta
+        for key, end in _markers(self.reply, self._scan):
+            if self.matched >= len(self.expected):
+                self.mismatch = f"unexpected {key!r} after the last of {len(self.expected)} markers"
+                return False
+            if key != self.expected[self.matched]:
+                self.mismatch = f"{key!r} where {self.expected[self.matched]!r} was expected (marker {self.matched})"
+                return False
+            self.matched += 1
+            self._scan = end
+        return True
@@ -0,0 +1,362 @@
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Token kinds
+TAG_OPEN = 'open'
+TAG_CLOSE = 'close'
+TAG_SELF_CLOSING = 'self_closing'
+COMMENT = 'comment'
+TEXT = 'text'
+ENTITY = 'entity'
+STRAY = 'stray'  # A '<' that does not start a tag; skipped by structure extraction
+
+TAG_KINDS = frozenset({TAG_OPEN, TAG_CLOSE, TAG_SELF_CLOSING, COMMENT})
+TEXT_KINDS = frozenset({TEXT, ENTITY})
+
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+})
+
+# Alternation order matches the legacy r'(<[^>]+>|<!--.*?-->|[^<]+)' scanner so that
+# structures built from the token stream are identical to the old regex pipeline.
+_TOKEN_RE = re.compile(
+    r'(?P<tag><[^>]+>)'
+    r'|(?P<comment><!--.*?-->)'
+    r'|(?P<entity>&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);)'
+    r'|(?P<text>[^<&]+|&)'
+    r'|(?P<stray><)'
+)
+_TAG_NAME_RE = re.compile(r'</?\s*([A-Za-z][^\s/>]*)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ATTRIBUTE_RE = re.compile(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"')
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+
+    @property
+    def is_tag(self) -> bool:
+        return self.kind in TAG_KINDS
+
+    @property
+    def name(self) -> Optional[str]:
+        """Lower-cased tag name, or None for comments, declarations and text."""
+        if self.kind not in TAG_KINDS or self.kind == COMMENT:
+            return None
+        return tag_name(self.text)
+
+
+def tag_name(tag: str) -> Optional[str]:
+    """Lower-cased element name of a '<...>' tag, or None for declarations and malformed tags."""
+    match = _TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else None
+
+
+def _tag_kind(tag: str) -> str:
+    """Determines the kind of a '<...>' token."""
+    if tag.startswith('<!--'):
+        return COMMENT
+    if tag.startswith('</'):
+        return TAG_CLOSE
+    if tag.endswith('/>') or tag.startswith('<!') or tag.startswith('<?'):
+        return TAG_SELF_CLOSING
+    match = _TAG_NAME_RE.match(tag)
+    if match and match.group(1).lower() in VOID_ELEMENTS:
+        return TAG_SELF_CLOSING
+    return TAG_OPEN
+
+
+def tokenize(content: str) -> Iterator[Token]:
+    """Splits content into a typed token stream in a single linear pass."""
+    for match in _TOKEN_RE.finditer(content):
+        group = match.lastgroup
+        text = match.group()
+        if group == 'tag':
+            kind = _tag_kind(text)
+        elif group == 'comment':
+            kind = COMMENT
+        elif group == 'entity':
+            kind = ENTITY
+        elif group == 'text':
+            kind = TEXT
+        else:
+            kind = STRAY
+        yield Token(kind, text, match.start(), match.end())
+
+
+def token_spans(content: str) -> Iterator[Tuple[str, int, int]]:
+    """Like tokenize, but yields only (kind, start, end) and skips building token texts."""
+    for match in _TOKEN_RE.finditer(content):
+        group = match.lastgroup
+        if group == 'tag':
+            kind = _tag_kind(match.group())
+        elif group == 'comment':
+            kind = COMMENT
+        elif group == 'entity':
+            kind = ENTITY
+        elif group == 'text':
+            kind = TEXT
+        else:
+            kind = STRAY
+        start, end = match.span()
+        yield kind, start, end
+
+
+def _rebase(tokens: Iterable[Token]) -> List[Token]:
+    """Recomputes offsets for a token list whose texts were rewritten."""
+    rebased = []
+    position = 0
+    for token in tokens:
+        end = position + len(token.text)
+        rebased.append(Token(token.kind, token.text, position, end))
+        position = end
+    return rebased
+
+
+def normalize_tokens(tokens: Iterable[Token]) -> List[Token]:
+    """
+    Token-level equivalent of HTMLProcessor.normalize_html: collapses whitespace,
+    drops blank text between tags and strips one presentational attribute per tag.
+    """
+    tokens = list(tokens)
+    normalized = []
+    for i, token in enumerate(tokens):
+        text = _WHITESPACE_RE.sub(' ', token.text)
+        if token.is_tag:
+            text = _ATTRIBUTE_RE.sub(r'\1', text)
+        elif token.kind == TEXT and text.endswith(' ') and i + 1 < len(tokens) \
+                and tokens[i + 1].text.startswith('<'):
+            prev_text = normalized[-1].text if normalized else ''
+            if text == ' ' and prev_text.endswith('>'):
+                continue  # "> <" -> "><"
+            if text.endswith('> '):
+                text = text[:-1]
+        normalized.append(Token(token.kind, text, token.start, token.end))
+    return _rebase(normalized)
+
+
+def remove_formatting_tokens(tokens: Iterable[Token]) -> List[Token]:
+    """Token-level equivalent of HTMLProcessor.remove_formatting."""
+    tokens = list(tokens)
+    cleaned = []
+    for i, token in enumerate(tokens):
+        text = _WHITESPACE_RE.sub(' ', token.text)
+        if token.kind == TEXT:
+            prev_text = cleaned[-1].text if cleaned else ''
+            next_text = tokens[i + 1].text if i + 1 < len(tokens) else ''
+            if text == ' ' and prev_text.endswith('>') and next_text.startswith('<'):
+                continue  # "> <" -> "><"
+            if text.endswith('> ') and next_text.startswith('<'):
+                text = text[:-1]
+            if text.startswith(' ') and prev_text.endswith('<br>'):
+                text = text[1:]  # "<br> " -> "<br>"
+            if text.endswith(' ') and next_text.startswith('<br>'):
+                text = text[:-1]  # " <br>" -> "<br>"
+            if not text:
+                continue
+        elif token.is_tag and text.endswith(' <br>'):
+            text = text[:-5] + '<br>'
+        cleaned.append(Token(token.kind, text, token.start, token.end))
+    return _rebase(cleaned)
+
+
+def render(tokens: Iterable[Token]) -> str:
+    """Joins a token stream back into a string."""
+    return ''.join(token.text for token in tokens)
+
+
+def structure_from_tokens(content: str, tokens: Iterable[Token], with_positions: bool = True) -> List[List]:
+    """
+    Builds the legacy extract_html_structure list ([item, is_tag(, end_position)])
+    from a token stream. Adjacent text and entity tokens form a single text item.
+    """
+    structure = []
+    text_start = text_end = -1
+
+    def flush():
+        item = content[text_start:text_end]
+        if item.strip():
+            structure.append([item, False, text_end] if with_positions else [item, False])
+
+    for token in tokens:
+        if token.kind in TEXT_KINDS:
+            if text_start != -1 and token.start == text_end:
+                text_end = token.end
+                continue
+            if text_start != -1:
+                flush()
+            text_start, text_end = token.start, token.end
+            continue
+        if text_start != -1:
+            flush()
+            text_start = -1
+        if token.kind != STRAY:
+            structure.append([token.text, True, token.end] if with_positions else [token.text, True])
+    if text_start != -1:
+        flush()
+    return structure
+
+
+def text_from_tokens(tokens: Iterable[Token]) -> str:
+    """Concatenates every non-tag token, i.e. the content with all tags removed."""
+    return ''.join(token.text for token in tokens if token.kind not in TAG_KINDS)
+
+
+# Markup as a browser reads it: a tag opens with '<' and a letter ('</' and a letter for end tags,
+# '<!' or '<?' for declarations), so the '<' of "x < y" is text. Complete comments and tags come
+# first; otherwise a comment or tag that is opened but not closed by the end of the content.
+_MARKUP_RE = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<tag></?[A-Za-z][^>]*>|<!(?!--)[^>]*>|<\?[^>]*>)'
+    r'|(?P<open><!--|</?[A-Za-z]|<[!?])',
+    re.DOTALL)
+
+
+def markup_spans(content: str, start: int = 0) -> Iterator[Tuple[Optional[str], int, int]]:
+    """
+    Yields (kind, start, end) for each tag and comment of content from start on. A tag or comment
+    still open at the end comes last with kind None and runs to the end, so content that is still
+    arriving can be scanned again from its start once more is known.
+    """
+    for match in _MARKUP_RE.finditer(content, start):
+        group = match.lastgroup
+        if group == 'open':
+            yield None, match.start(), len(content)
+            return
+        yield COMMENT if group == 'comment' else _tag_kind(match.group()), match.start(), match.end()
+
+
+# Start-tag recognition as in html.parser, which BeautifulSoup uses. The patterns are copies of
+# html.parser's private ones (CPython 3.11), kept here so that content labels do not change when a
+# Python patch release edits them. tests/test_content_classifier.py checks the labels against
+# BeautifulSoup.
+_STARTTAG_OPEN_RE = re.compile(r'<[a-zA-Z]')
+_TAGFIND_RE = re.compile(r'([a-zA-Z][^\t\n\r\f />\x00]*)(?:\s|/(?!>))*')
+_ATTRFIND_RE = re.compile(
+    r'((?<=[\'"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*'
+    r'(\'[^\']*\'|"[^"]*"|(?![\'"])[^>\s]*))?(?:\s|/(?!>))*')
+_STARTTAG_END_RE = re.compile(r"""
+  <[a-zA-Z][^\t\n\r\f />\x00]*       # tag name
+  (?:[\s/]*                          # optional whitespace before attribute name
+    (?:(?<=['"\s/])[^\s/>][^\s/=>]*  # attribute name
+      (?:\s*=+\s*                    # value indicator
+        (?:'[^']*'                   # LITA-enclosed value
+          |"[^"]*"                   # LIT-enclosed value
+          |(?!['"])[^>\s]*           # bare value
+         )
+        \s*                          # possibly followed by a space
+       )?(?:\s|/(?!>))*
+     )*
+   )?
+  \s*                                # trailing whitespace
+""", re.VERBOSE)
+_COMMENT_CLOSE_RE = re.compile(r'--\s*>')
+_CHARREF_RE = re.compile(r'&#(?:[0-9]+|[xX][0-9a-fA-F]+)[^0-9a-fA-F]')
+_ENTITYREF_RE = re.compile(r'&([a-zA-Z][-.a-zA-Z0-9]*)[^a-zA-Z0-9]')
+_INCOMPLETE_REF_RE = re.compile(r'&[a-zA-Z#]')
+# html.parser scans for '<' and '&' in data (BeautifulSoup turns convert_charrefs off)
+_INTERESTING_RE = re.compile(r'[&<]')
+_MARKED_SECTION_CLOSE_RE = re.compile(r']\s*]\s*>')
+_INCOMPLETE_TAG_CHARS = "abcdefghijklmnopqrstuvwxyz=/ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def start_tag_names(text: str) -> Iterator[str]:
+    """
+    Yields lower-cased start tag names in document order, recognising tags exactly as
+    html.parser (the backend BeautifulSoup uses) does, but without
+    building a tree, parsing attribute values or decoding entities.
+
+    BeautifulSoup calls feed() and then close(), so the parser makes a first pass that stops at
+    incomplete constructs and a final pass that treats whatever it cannot parse as text.
+    """
+    i = 0
+    n = len(text)
+    for end in (False, True):
+        while i < n:
+            match = _INTERESTING_RE.search(text, i)
+            if not match:
+                return
+            i = match.start()
+            if text.startswith("<", i):
+                if _STARTTAG_OPEN_RE.match(text, i):
+                    k, is_tag = _parse_start_tag(text, i)
+                    if is_tag:
+                        yield _TAGFIND_RE.match(text, i + 1).group(1).lower()
+                elif text.startswith("<!--", i):
+                    close = _COMMENT_CLOSE_RE.search(text, i + 4)
+                    k = close.end() if close else -1
+                elif text.startswith("<![", i):
+                    close = _MARKED_SECTION_CLOSE_RE.search(text, i + 3)
+                    k = close.end() if close else -1
+                elif text.startswith("</", i) or text.startswith("<?", i) or text.startswith("<!", i):
+                    # End tags, processing instructions, doctypes and bogus comments end at the next '>'
+                    k = text.find(">", i + 2)
+                    k = k + 1 if k >= 0 else -1
+                elif i + 1 < n:
+                    i += 1  # A lone '<' is text
+                    continue
+                else:
+                    break
+                if k < 0:
+                    if not end:
+                        break
+                    # Unterminated markup is emitted as text up to the next '>' (or '<')
+                    k = text.find(">", i + 1)
+                    if k < 0:
+                        k = text.find("<", i + 1)
+                        if k < 0:
+                            k = i + 1
+                    else:
+                        k += 1
+                i = k
+            elif text.startswith("&#", i):
+                ref = _CHARREF_RE.match(text, i)
+                if ref:
+                    i = ref.end() if text.startswith(";", ref.end() - 1) else ref.end() - 1
+                    continue
+                if text.find(";", i) >= 0:
+                    i += 2
+                break
+            else:
+                ref = _ENTITYREF_RE.match(text, i)
+                if ref:
+                    i = ref.end() if text.startswith(";", ref.end() - 1) else ref.end() - 1
+                elif _INCOMPLETE_REF_RE.match(text, i) or i + 1 >= n:
+                    break
+                else:
+                    i += 1
+        # After the final pass anything left over is text
+
+
+def _parse_start_tag(text: str, i: int) -> Tuple[int, bool]:
+    """
+    Mirrors HTMLParser.parse_starttag. Returns (end, is_tag); end is -1 for an unterminated tag,
+    and is_tag is False for malformed tags that html.parser passes through as text.
+    """
+    j = _STARTTAG_END_RE.match(text, i).end()
+    next_char = text[j:j + 1]
+    if next_char == ">":
+        endpos = j + 1
+    elif next_char == "/":
+        if text.startswith("/>", j):
+            endpos = j + 2
+        elif text.startswith("/", j):
+            return -1, False
+        else:
+            endpos = j if j > i else i + 1
+    elif next_char == "" or next_char in _INCOMPLETE_TAG_CHARS:
+        return -1, False
+    else:
+        endpos = j if j > i else i + 1
+
+    k = _TAGFIND_RE.match(text, i + 1).end()
+    while k < endpos:
+        attribute = _ATTRFIND_RE.match(text, k)
+        if not attribute:
+            break
+        k = attribute.end()
+    return endpos, text[k:endpos].strip() in (">", "/>")
@@ -0,0 +1,90 @@
+import logging
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+from config import INCREMENTAL_CONFIG
+from checkpoint import content_hash
+from columnar import read_table, table_columns
+
+logger = logging.getLogger('website_translator')
+
+_KEY_SEPARATOR = '\x1f'
+
+
+def identity_columns(df: pd.DataFrame, key_columns: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Columns that identify a row across exports: key_columns (or INCREMENTAL_CONFIG['key_columns'])
+    when set, else every column except VALUE and the columns the pipeline derives from it.
+    """
+    key_columns = key_columns or INCREMENTAL_CONFIG['key_columns']
+    if key_columns:
+        return list(key_columns)
+    return [column for column in df.columns
+            if column not in ("VALUE", "CONTENT_TYPE") and not column.startswith(("VALUE_", "STRUCTURE_OK_"))]
+
+
+def key_value(value) -> str:
+    """
+    Canonical text of one key cell, independent of the dtype it was read with: a column of integer
+    IDs with a gap is read as float, so 1.0 is written as "1", and missing values become "".
+    """
+    if pd.isna(value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def row_keys(df: pd.DataFrame, key_columns: Sequence[str]) -> List[str]:
+    """One identity string per row; without key columns the row's index label (its position in the file) is used."""
+    if not key_columns:
+        return [str(row) for row in df.index]
+    columns = [[key_value(value) for value in df[column].tolist()] for column in key_columns]
+    return [_KEY_SEPARATOR.join(values) for values in zip(*columns)]
+
+
+class PreviousTranslations:
+    """
+    Translations from a previous run's output CSV, keyed by row identity plus a hash of the
+    normalized VALUE, so that an unchanged row of a new export can reuse them.
+    """
+
+    def __init__(self, output_csv: str, target_languages: Sequence[str], key_columns: Sequence[str]):
+        available = table_columns(output_csv)
+        missing = [column for column in list(key_columns) + ["VALUE"] if column not in available]
+        if missing:
+            raise ValueError(f"Previous output {output_csv} is missing columns: {missing}")
+        # Only the columns used here are read, not the rest of a possibly wide export
+        wanted = set(key_columns) | {"VALUE"} | {f"{prefix}_{language}" for prefix in ("VALUE", "STRUCTURE_OK")
+                                                 for language in target_languages}
+        df = read_table(output_csv, columns=[column for column in available if column in wanted])
+
+        self.target_languages = list(target_languages)
+        self.key_columns = list(key_columns)
+        self.entries: Dict[tuple, Dict[str, str]] = {}
+        columns = [df[f"VALUE_{language}"].tolist() if f"VALUE_{language}" in df.columns else [None] * len(df)
+                   for language in self.target_languages]
+        # Rows flagged with a tag structure different from their source are translated again too
+        structure_ok = [all(flags) for flags in zip(*(
+            df[f"STRUCTURE_OK_{language}"].astype(bool).tolist() if f"STRUCTURE_OK_{language}" in df.columns
+            else [True] * len(df) for language in self.target_languages))]
+        for key, value, ok, *translations in zip(row_keys(df, self.key_columns), df["VALUE"].tolist(),
+                                                 structure_ok, *columns):
+            # Only rows finished in every language are reusable; failed or missing ones are translated again
+            if ok and all(isinstance(translation, str) and not translation.startswith("ERROR:")
+                          for translation in translations):
+                self.entries[(key, content_hash(value))] = dict(zip(self.target_languages, translations))
+        logger.info(f"Loaded {len(self.entries)} reusable rows from {output_csv}")
+
+    def carry_forward(self, df: pd.DataFrame, rows: pd.Series) -> Dict[object, Dict[str, str]]:
+        """
+        Maps the index of each selected row of df (with normalized VALUE) whose identity and content
+        are unchanged to its previous {language: translation}.
+        """
+        carried = {}
+        for row, key, value, selected in zip(df.index, row_keys(df, self.key_columns), df["VALUE"].tolist(),
+                                             rows.tolist()):
+            if selected:
+                previous = self.entries.get((key, content_hash(value)))
+                if previous is not None:
+                    carried[row] = previous
+        return carried
@@ -1,19 +1,22 @@
 import os
-import pandas as pd
-import time
 import logging
-from deep_translator import GoogleTranslator
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 from processor_01 import HTMLProcessor  # Ensure you have this module
+from translation_memory import open_translation_memory
+from translation_engine import AsyncTranslationEngine, GoogleTranslatorBackend
+from checkpoint import open_journal
+from translator import translate_deduplicated_targets
+from config import LANGUAGE_CONFIG
+from metrics import METRICS
+from columnar import read_table, write_table
 
 # Configuration
 SOURCE_FILE = ".html_processor/CSVs/processed_output.csv"  # File with VALUE_processed column
 OUTPUT_FILE = ".html_processor/CSVs/translated_output.csv"
 LOG_FILE = "translation_log.txt"
-TARGET_LANGUAGE = "en"  # English Translation
+TARGET_LANGUAGES = list(LANGUAGE_CONFIG['languages'])  # Every configured language, translated in one pass
 BATCH_SIZE = 200
-RATE_LIMIT_DELAY = 1  # Delay in seconds
 API_RETRY_LIMIT = 3  # Number of retries for failed translations
 
 # Logging setup
@@ -23,43 +26,76 @@ logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s -
 processor = HTMLProcessor()
 
 
-def translate_text(text):
-    """Translates only translatable text while preserving HTML structure."""
-    if pd.isna(text) or not text.strip():
-        return text  # Skip empty or NaN values
+def translate_texts(texts, engine, target_languages=TARGET_LANGUAGES):
+    """
+    Translates only translatable text of each cell into every target language concurrently while
+    preserving HTML structure. Each cell is parsed once; returns {language: translations}.
+    """
+    texts = list(texts)
+    translatable_texts = [processor.extract_translatable_text(text) for text in texts]
 
-    original_structure = processor.extract_html_structure(text)
-    translatable_text = processor.extract_translatable_text(text)
+    with tqdm(total=len(texts) * len(target_languages), desc="Translating...") as progress_bar, METRICS.stage('api'):
+        translated = engine.translate_all_targets(translatable_texts, target_languages, progress=progress_bar.update)
 
-    retries = 0
-    while retries < API_RETRY_LIMIT:
-        try:
-            translated_text = GoogleTranslator(source="tr", target=TARGET_LANGUAGE).translate(translatable_text)
-            return processor.reconstruct_html_from_structure(original_structure, translated_text)
-        except Exception as e:
-            logging.error(f"❌ Translation failed for text: {text[:50]} | Attempt {retries + 1} | Error: {e}")
-            retries += 1
-            time.sleep(2)  # Wait before retrying
-
-    return "ERROR: Translation Failed"
+    structures = {}
+    results = {language: [] for language in target_languages}
+    for language in target_languages:
+        for index, (text, translated_text) in enumerate(zip(texts, translated[language])):
+            if translated_text.startswith("ERROR:"):
+                logging.error(f"❌ Translation failed for text: {text[:50]} | Error: {translated_text}")
+                results[language].append("ERROR: Translation Failed")
+            else:
+                if index not in structures:
+                    structures[index] = processor.extract_html_structure(text)
+                results[language].append(processor.reconstruct_html_from_structure(structures[index], translated_text))
+    return results
 
 
 def process_translation():
     """Reads the processed CSV, translates text, and saves the output."""
-    df = pd.read_csv(SOURCE_FILE)
+    METRICS.reset()
+    METRICS.start_snapshots()
+    with METRICS.stage('read_csv'):
+        df = read_table(SOURCE_FILE)
 
     if "VALUE_processed" not in df.columns:
         raise ValueError("❌ Column 'VALUE_processed' is missing. Ensure the file has been pre-processed.")
 
     print(f"🚀 Translating {len(df)} rows... This may take a while.")
-    tqdm.pandas(desc="Translating...")
-
-    df["VALUE_EN"] = df["VALUE_processed"].progress_apply(translate_text)
 
-    df.to_csv(OUTPUT_FILE, index=False)
+    values = df["VALUE_processed"]
+    present = values.notna() & values.astype(str).str.strip().ne("")  # Skip empty or NaN values
+    journal = open_journal(OUTPUT_FILE)  # Only when TRANSLATION_CONFIG['recovery_mode'] is on
+    memory = open_translation_memory()
+    # Concurrency and request throttling come from CONCURRENCY_CONFIG
+    engine = AsyncTranslationEngine(GoogleTranslatorBackend(source_language="tr"), memory=memory,
+                                    max_retries=API_RETRY_LIMIT)
+    with METRICS.stage('translate'):
+        translated = translate_deduplicated_targets(
+            values[present], lambda texts, languages: translate_texts(texts, engine, languages),
+            TARGET_LANGUAGES, journal)
+    for language in TARGET_LANGUAGES:
+        column = f"VALUE_{language.upper()}"
+        df[column] = values
+        df.loc[present, column] = translated[language]
+
+    with METRICS.stage('write_csv'):
+        write_table(df, OUTPUT_FILE)
+    if journal is not None:
+        journal.remove()
+    engine.close()
     print(f"✅ Translation complete! Saved to {OUTPUT_FILE}")
     logging.info(f"Translation completed. Output saved to {OUTPUT_FILE}")
 
+    if memory is not None:
+        stats = memory.stats()
+        print(f"📦 Translation memory: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate, {stats['size']} entries)")
+        logging.info(f"Translation memory stats: {stats}")
+        memory.close()
+    METRICS.count('rows', len(df))
+    METRICS.report()
+
 
 if __name__ == "__main__":
     process_translation()
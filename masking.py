@@ -0,0 +1,185 @@
+import re
+import logging
+from collections import Counter
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+from config import PREFILTER_CONFIG
+from html_tokenizer import tokenize, TAG_OPEN, TEXT, ENTITY
+
+logger = logging.getLogger('website_translator')
+
+PLACEHOLDER_RE = re.compile(r'\[\[(\d+)\]\]')
+# Text the model must not touch: URLs, e-mail addresses, template variables and literal placeholders
+_PROTECTED_RE = re.compile(
+    r'https?://[^\s<>"\']+'
+    r'|www\.[^\s<>"\']+'
+    r'|[\w.+-]+@[\w-]+\.[\w.-]+'
+    r'|\{\{.*?\}\}|\{%.*?%\}'
+    r'|\[\[\d+\]\]'
+)
+_RAW_TEXT_ELEMENTS = ("script", "style")
+# Double-quoted (or template) string literals in script/style bodies. Single-quoted ones are left
+# alone since a translation containing an apostrophe would end them early.
+_STRING_LITERAL_RE = re.compile(r'(["`])([^"`\\\n]*)\1')
+# A literal worth translating reads like a phrase: starts with a letter, contains a space and has
+# nothing code-like such as braces, operators, paths or template variables
+_READABLE_LITERAL_RE = re.compile(r'[^\W\d_][^{}<>;=\\/|$]*\s[^{}<>;=\\/|$]*')
+# What a translated literal must not contain as is: its quote, backslashes, line breaks, a
+# template substitution and anything that could close the script/style element. The escapes
+# (and line breaks turned into spaces) mean the same in JavaScript and CSS strings.
+_LITERAL_UNSAFE_RE = {quote: re.compile(rf'[{quote}\\]|\r?\n|\r|\$\{{|</') for quote in '"`'}
+_LITERAL_ESCAPES = {'\r\n': ' ', '\n': ' ', '\r': ' ', '${': '\\${', '</': '<\\/'}
+
+
+class MaskedContent(NamedTuple):
+    text: str  # Content with markup replaced by [[n]] placeholders
+    placeholders: List[str]  # Original span for each placeholder number
+    literals: Tuple[int, ...] = ()  # Placeholders that open a script string literal (its text follows them)
+
+
+def placeholder(index: int) -> str:
+    return f"[[{index}]]"
+
+
+def mask_html(content: str, script_strings: bool = PREFILTER_CONFIG['script_strings']) -> MaskedContent:
+    """
+    Replaces every run of tags (plus whitespace between them), script/style bodies and protected
+    spans such as URLs with a numbered placeholder, leaving only translatable text. With
+    script_strings, human-readable string literals inside script/style bodies are left unmasked.
+    """
+    pieces = []  # (masked, text)
+    literal_pieces = set()  # Masked pieces that end with the opening quote of a readable literal
+    raw_end = 0  # End of the script/style element currently being skipped
+    lowered = None
+
+    def add(masked: bool, text: str):
+        if pieces and pieces[-1][0] == masked:
+            pieces[-1] = (masked, pieces[-1][1] + text)
+        else:
+            pieces.append((masked, text))
+
+    for token in tokenize(content):
+        if token.end <= raw_end:
+            continue
+        if token.start < raw_end:
+            # A token straddling the end of a raw element (the tokenizer does not know about them)
+            add(True, content[token.start:raw_end])
+            add(False, content[raw_end:token.end])
+            continue
+        if token.kind == TEXT:
+            if not token.text.strip() and pieces and pieces[-1][0]:
+                add(True, token.text)  # Whitespace between tags stays with the markup
+                continue
+            position = 0
+            for match in _PROTECTED_RE.finditer(token.text):
+                if match.start() > position:
+                    add(False, token.text[position:match.start()])
+                add(True, match.group())
+                position = match.end()
+            if position < len(token.text):
+                add(False, token.text[position:])
+        elif token.kind == ENTITY:
+            add(False, token.text)
+        elif token.kind == TAG_OPEN and token.name in _RAW_TEXT_ELEMENTS:
+            # Script/style bodies are never translated: mask through the matching close tag
+            if lowered is None:
+                lowered = content.lower()
+            close = lowered.find(f"</{token.name}", token.end)
+            close_end = lowered.find(">", close) + 1 if close != -1 else 0
+            raw_end = close_end if close_end > 0 else len(content)
+            position = token.start
+            if script_strings:
+                for match in _STRING_LITERAL_RE.finditer(content, token.end, close if close != -1 else raw_end):
+                    if _READABLE_LITERAL_RE.fullmatch(match.group(2)) and not _PROTECTED_RE.search(match.group(2)):
+                        add(True, content[position:match.start(2)])
+                        literal_pieces.add(len(pieces) - 1)
+                        add(False, match.group(2))
+                        position = match.end(2)
+            add(True, content[position:raw_end])
+        else:
+            add(True, token.text)
+
+    placeholders = []
+    literals = []
+    parts = []
+    for position, (masked, text) in enumerate(pieces):
+        if masked:
+            if position in literal_pieces:
+                literals.append(len(placeholders))
+            parts.append(placeholder(len(placeholders)))
+            placeholders.append(text)
+        else:
+            parts.append(text)
+    return MaskedContent("".join(parts), placeholders, tuple(literals))
+
+
+def escape_literal(text: str, quote: str) -> str:
+    """Escapes translated text for a script string literal delimited by quote (a double quote or backtick)."""
+    return _LITERAL_UNSAFE_RE[quote].sub(lambda match: _LITERAL_ESCAPES.get(match.group(), '\\' + match.group()),
+                                         text)
+
+
+def missing_placeholders(translated: str, placeholders: Sequence[str]) -> List[int]:
+    """Placeholder numbers that did not come back exactly once (unknown extras count as index -1)."""
+    found = Counter(int(number) for number in PLACEHOLDER_RE.findall(translated))
+    problems = [index for index in range(len(placeholders)) if found[index] != 1]
+    if any(number >= len(placeholders) for number in found):
+        problems.append(-1)
+    return problems
+
+
+def unmask_html(translated: str, placeholders: Sequence[str], literals: Sequence[int] = ()) -> Optional[str]:
+    """
+    Restores the original markup, or returns None when any placeholder is missing or duplicated.
+    Translated script string literals (the text after each placeholder in literals) are escaped
+    for their quotes; one that no longer sits between its two placeholders also gives None.
+    """
+    problems = missing_placeholders(translated, placeholders)
+    if problems:
+        logger.error(f"Placeholder validation failed for {problems}")
+        return None
+    if not literals:
+        return PLACEHOLDER_RE.sub(lambda match: placeholders[int(match.group(1))], translated)
+
+    # split() alternates text and placeholder numbers: text, n, text, n, ..., text
+    parts = PLACEHOLDER_RE.split(translated)
+    literal_set = set(literals)
+    for position in range(1, len(parts), 2):
+        number = int(parts[position])
+        if number in literal_set:
+            if position + 2 >= len(parts) or int(parts[position + 2]) != number + 1:
+                logger.error(f"Script string literal after placeholder {number} lost its closing quote")
+                return None
+            parts[position + 1] = escape_literal(parts[position + 1], placeholders[number][-1])
+        parts[position] = placeholders[number]
+    return "".join(parts)
+
+
+def mask_all(contents: Sequence[str]) -> List[MaskedContent]:
+    """Masks every content once; the result can be translated into any number of languages."""
+    masked = [mask_html(content) for content in contents]
+    original_size = sum(len(content) for content in contents)
+    masked_size = sum(len(item.text) for item in masked)
+    if original_size:
+        logger.info(f"Masking reduced prompt content from {original_size} to {masked_size} characters "
+                    f"({1 - masked_size / original_size:.1%} smaller).")
+    return masked
+
+
+def unmask_all(masked: Sequence[MaskedContent], translated: Sequence[str]) -> List[Optional[str]]:
+    """Unmasks translated replies; 'ERROR: ...' replies pass through and failed validations become None."""
+    results = []
+    for item, reply in zip(masked, translated):
+        if reply.startswith("ERROR:"):
+            results.append(reply)
+        else:
+            results.append(unmask_html(reply, item.placeholders, item.literals))
+    return results
+
+
+def translate_masked(contents: Sequence[str], translate_many: Callable[[List[str]], List[str]]) -> List[Optional[str]]:
+    """
+    Masks each content, translates the masked texts with translate_many and unmasks the replies.
+    Entries whose placeholders did not all survive come back as None so callers can fall back.
+    """
+    masked = mask_all(contents)
+    return unmask_all(masked, translate_many([item.text for item in masked]))
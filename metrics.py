@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from config import METRICS_CONFIG
+
+logger = logging.getLogger('website_translator')
+
+_PROMETHEUS_PREFIX = 'html_processor'
+_MAX_SAMPLES = 100000  # Latency samples kept per name; beyond that a uniform reservoir sample is kept
+
+
+class Metrics:
+    """
+    Run metrics: inclusive per-stage timers, counters (API calls, tokens, retries, 429s, cache hits),
+    queue-depth gauges that remember their maximum and latency samples for percentiles. Updates are
+    plain dict arithmetic under one lock, so the instrumentation can stay on in production and be
+    written from worker threads while the snapshot thread reads it.
+    """
+
+    def __init__(self, enabled: bool = METRICS_CONFIG['enabled']):
+        self.enabled = enabled
+        self._lock = threading.RLock()  # Reentrant: summary computes percentiles under it
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_stop = threading.Event()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stage_seconds: Dict[str, float] = {}
+            self.stage_calls: Dict[str, int] = {}
+            self.counters: Dict[str, float] = {}
+            self.gauges: Dict[str, float] = {}
+            self.gauge_max: Dict[str, float] = {}
+            self.samples: Dict[str, List[float]] = {}
+            self._observed: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block under stage name (nested stages are included in their parents)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                seconds = time.perf_counter() - start
+                with self._lock:
+                    self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+                    self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: float = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def adjust(self, name: str, delta: float):
+        """Moves gauge name (e.g. a queue depth) by delta and tracks its maximum."""
+        if self.enabled:
+            with self._lock:
+                value = self.gauges.get(name, 0) + delta
+                self.gauges[name] = value
+                if value > self.gauge_max.get(name, 0):
+                    self.gauge_max[name] = value
+
+    def observe(self, name: str, seconds: float):
+        """Records one latency sample under name (e.g. per translated segment)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self.samples.setdefault(name, [])
+            seen = self._observed[name] = self._observed.get(name, 0) + 1
+            if len(samples) < _MAX_SAMPLES:
+                samples.append(seconds)
+            else:
+                slot = random.randrange(seen)
+                if slot < _MAX_SAMPLES:
+                    samples[slot] = seconds
+
+    def percentile(self, name: str, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            hits = self.counters.get('cache_hits', 0)
+            lookups = hits + self.counters.get('cache_misses', 0)
+            return {
+                'elapsed_seconds': round(time.time() - self.started, 3),
+                'stages': {name: {'seconds': round(seconds, 4), 'calls': self.stage_calls[name]}
+                           for name, seconds in self.stage_seconds.items()},
+                'counters': dict(self.counters),
+                'cache_hit_rate': round(hits / lookups, 4) if lookups else None,
+                'queue_depth': {name: {'current': self.gauges[name], 'max': self.gauge_max.get(name, 0)}
+                                for name in self.gauges},
+                'latency': {name: {'count': self._observed[name],
+                                   'p50_ms': round(self.percentile(name, 0.50) * 1000, 3),
+                                   'p99_ms': round(self.percentile(name, 0.99) * 1000, 3)}
+                            for name in self.samples if self.samples[name]},
+            }
+
+    def prometheus(self) -> str:
+        """Renders the summary in the Prometheus text exposition format (for the node-exporter textfile collector)."""
+        summary = self.summary()
+        lines = [f"# TYPE {_PROMETHEUS_PREFIX}_stage_seconds_total counter"]
+        lines += [f'{_PROMETHEUS_PREFIX}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]}'
+                  for name, stage in summary['stages'].items()]
+        for name, value in summary['counters'].items():
+            lines += [f"# TYPE {_PROMETHEUS_PREFIX}_{name}_total counter", f"{_PROMETHEUS_PREFIX}_{name}_total {value}"]
+        lines.append(f"# TYPE {_PROMETHEUS_PREFIX}_queue_depth gauge")
+        for name, depth in summary['queue_depth'].items():
+            lines.append(f'{_PROMETHEUS_PREFIX}_queue_depth{{queue="{name}"}} {depth["current"]}')
+            lines.append(f'{_PROMETHEUS_PREFIX}_queue_depth_max{{queue="{name}"}} {depth["max"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str = METRICS_CONFIG['snapshot_path'],
+                       snapshot_format: str = METRICS_CONFIG['snapshot_format']):
+        """Atomically writes the current metrics as JSON or a Prometheus textfile."""
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        content = self.prometheus() if snapshot_format == 'prometheus' else json.dumps(self.summary(), indent=2)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as snapshot:
+            snapshot.write(content)
+        os.replace(temporary, path)
+
+    def start_snapshots(self, interval: float = METRICS_CONFIG['snapshot_interval']):
+        """Writes a snapshot every interval seconds on a daemon thread when a snapshot_path is configured."""
+        if not self.enabled or not METRICS_CONFIG['snapshot_path'] or self._snapshot_thread is not None:
+            return
+        self._snapshot_stop.clear()
+
+        def loop():
+            while not self._snapshot_stop.wait(interval):
+                try:
+                    self.write_snapshot()
+                except OSError as e:
+                    logger.warning(f"Metrics snapshot failed: {e}")
+
+        self._snapshot_thread = threading.Thread(target=loop, name='metrics-snapshot', daemon=True)
+        self._snapshot_thread.start()
+
+    def report(self):
+        """Ends a run: stops periodic snapshots, writes a final one and logs/prints the summary."""
+        if not self.enabled:
+            return
+        if self._snapshot_thread is not None:
+            self._snapshot_stop.set()
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        self.write_snapshot()
+
+        summary = self.summary()
+        logger.info(f"Run metrics: {json.dumps(summary)}")
+        print(f"📊 Run finished in {summary['elapsed_seconds']:.1f}s")
+        width = max(map(len, summary['stages']), default=0)
+        for name, stage in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"   {name:<{width}} {stage['seconds']:>10.2f}s  ({stage['calls']} calls)")
+        if summary['counters']:
+            print("   " + ", ".join(f"{name}={value:g}" for name, value in sorted(summary['counters'].items())))
+        if summary['cache_hit_rate'] is not None:
+            print(f"   cache hit rate {summary['cache_hit_rate']:.1%}")
+        for name, depth in summary['queue_depth'].items():
+            print(f"   max {name} {depth['max']:g}")
+
+
+# Shared by every module in the process, like the loggers
+METRICS = Metrics()
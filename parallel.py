@@ -0,0 +1,67 @@
+import os
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, List, Optional, Sequence
+from config import PARALLEL_CONFIG
+
+logger = logging.getLogger('website_translator')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def worker_count(workers: Optional[int] = None) -> int:
+    """Resolves the worker count: explicit argument, then PARALLEL_CONFIG['workers'], then all cores."""
+    if workers is None:
+        workers = PARALLEL_CONFIG['workers']
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Keeps one pool alive across calls so streamed chunks do not pay process start-up each time."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _apply_shard(func: Callable, shard: List) -> List:
+    return [func(item) for item in shard]
+
+
+def parallel_map(func: Callable, items: Sequence, workers: Optional[int] = None,
+                 shard_size: int = PARALLEL_CONFIG['shard_size']) -> List:
+    """
+    Applies func to every item across a process pool and returns the results in input order.
+    Items are sent as contiguous shards so each worker round trip pickles one list, not one cell.
+    func must be importable at module level (plain functions and static methods are).
+    Falls back to a plain loop for one worker or inputs below PARALLEL_CONFIG['min_items'].
+    """
+    items = list(items)
+    workers = worker_count(workers)
+    if workers == 1 or len(items) < PARALLEL_CONFIG['min_items']:
+        return _apply_shard(func, items)
+
+    # At least a few shards per worker so a slow shard does not leave the others idle
+    shard_size = max(1, min(shard_size, -(-len(items) // (workers * 4))))
+    shards = [items[start:start + shard_size] for start in range(0, len(items), shard_size)]
+    logger.info(f"Processing {len(items)} items in {len(shards)} shards on {workers} workers.")
+
+    results = []
+    for shard_result in _get_pool(workers).map(_apply_shard, repeat(func), shards):
+        results.extend(shard_result)
+    return results
@@ -0,0 +1,144 @@
+import logging
+import pandas as pd
+from typing import Dict, Optional, Sequence, Tuple
+from config import PIPELINE_CONFIG
+from parallel import parallel_map
+from columnar import iter_table, read_table
+from checkpoint import open_journal
+from metrics import METRICS
+from incremental import PreviousTranslations, identity_columns
+from content_classifier import classify_content, RELEVANT_CONTENT_TYPES
+from HTML_in_CSV_Processor import HTMLProcessor
+from translation_memory import open_translation_memory
+from translation_engine import AsyncTranslationEngine, create_backend
+from translator import (TRANSLATABLE_TYPES, default_target_languages, flag_structure_mismatches,
+                        translate_deduplicated_targets, translate_targets)
+
+logger = logging.getLogger('website_translator')
+
+
+def classify_and_normalize(value) -> Tuple[str, Optional[str]]:
+    """(content type, normalized HTML) for one cell; rows the filter will drop are not normalized."""
+    content_type = classify_content(value)
+    if content_type not in RELEVANT_CONTENT_TYPES:
+        return content_type, None
+    return content_type, HTMLProcessor.normalize_html(value)
+
+
+class StreamingPipeline:
+    """
+    Runs classify -> filter -> normalize -> translate -> reconstruct on row chunks of a CSV export,
+    appending each finished chunk to the output so memory use does not grow with file size.
+    """
+
+    def __init__(self, api_key: str, target_languages: Optional[Sequence[str]] = None,
+                 chunksize: int = PIPELINE_CONFIG['chunksize'], previous_output: Optional[str] = None):
+        # Every language is translated from the same parsed, masked chunk, adding a VALUE_<LANG> column each
+        if isinstance(target_languages, str):
+            target_languages = [target_languages]
+        self.target_languages = list(target_languages or default_target_languages())
+        self.chunksize = chunksize
+        self.processor = HTMLProcessor()
+        self.memory = open_translation_memory()
+        self.engine = AsyncTranslationEngine(create_backend(api_key=api_key), memory=self.memory)
+        self.journal = None  # Opened per run when recovery_mode is on
+        self.previous_output = previous_output  # Earlier translated export to carry unchanged rows from
+        self.previous = None
+
+    def language_columns(self) -> Dict[str, None]:
+        """Empty VALUE_<LANG> and STRUCTURE_OK_<LANG> columns, in the order process_chunk adds them."""
+        return {f"{prefix}_{language}": None for prefix in ("VALUE", "STRUCTURE_OK")
+                for language in self.target_languages}
+
+    def process_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Classifies, filters, normalizes and translates one chunk of rows."""
+        chunk = chunk.copy()
+        # One pool round trip per shard does both, so the chunk's cells are pickled once
+        with METRICS.stage('classify_normalize'):
+            cells = parallel_map(classify_and_normalize, chunk["VALUE"].tolist())
+        chunk["CONTENT_TYPE"] = [content_type for content_type, _ in cells]
+        relevant = chunk["CONTENT_TYPE"].isin(RELEVANT_CONTENT_TYPES).tolist()
+        chunk = chunk[relevant].copy()
+        if chunk.empty:
+            # Same columns as a translated chunk: run() takes the output header from the first chunk
+            return chunk.assign(**self.language_columns())
+        chunk["VALUE"] = [normalized for (_, normalized), keep in zip(cells, relevant) if keep]
+        translatable = chunk["CONTENT_TYPE"].isin(TRANSLATABLE_TYPES)
+        carried = {}
+        if self.previous_output is not None:
+            if self.previous is None:
+                self.previous = PreviousTranslations(self.previous_output, self.target_languages,
+                                                     identity_columns(chunk))
+            carried = self.previous.carry_forward(chunk, translatable)
+        to_translate = translatable & ~chunk.index.isin(list(carried))
+        for language in self.target_languages:
+            chunk[f"VALUE_{language}"] = chunk["VALUE"]
+            if carried:
+                chunk.loc[list(carried), f"VALUE_{language}"] = [
+                    translations[language] for translations in carried.values()]
+        if to_translate.any():
+            with METRICS.stage('translate'):
+                translated = translate_deduplicated_targets(
+                    chunk.loc[to_translate, "VALUE"],
+                    lambda values, languages: translate_targets(values, self.engine, languages, self.processor),
+                    self.target_languages,
+                    self.journal
+                )
+            for language in self.target_languages:
+                chunk.loc[to_translate, f"VALUE_{language}"] = translated[language]
+        flag_structure_mismatches(chunk, translatable, self.target_languages)
+        return chunk
+
+    def run(self, input_csv: str, output_csv: str) -> int:
+        """Streams input_csv through the pipeline into output_csv; returns the number of rows written."""
+        written = 0
+        first = True
+        # Output is rewritten from the start on a restart; journaled rows are filled in without API calls
+        self.journal = open_journal(output_csv)
+        METRICS.reset()
+        METRICS.start_snapshots()
+        reader = iter_table(input_csv, self.chunksize)  # CSV, Parquet or Arrow input
+        number = 0
+        while True:
+            with METRICS.stage('read_csv'):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            number += 1
+            if "VALUE" not in chunk.columns:
+                raise ValueError("CSV is missing the 'VALUE' column.")
+
+            result = self.process_chunk(chunk)
+            with METRICS.stage('write_csv'):
+                result.to_csv(output_csv, mode="w" if first else "a", header=first, index=False)
+            first = False
+            METRICS.count('rows', len(chunk))
+            written += len(result)
+            print(f"📄 Chunk {number}: {len(chunk)} rows read, {len(result)} written ({written} total)")
+
+        if first:
+            # Empty input: still leave a valid (header-only) output behind
+            empty = read_table(input_csv).assign(CONTENT_TYPE=None)
+            empty.assign(**self.language_columns()).to_csv(output_csv, index=False)
+
+        print(f"✅ Streamed translation saved to {output_csv}")
+        if self.journal is not None:
+            self.journal.remove()
+            self.journal = None
+        self.engine.close()
+        if self.memory is not None:
+            stats = self.memory.stats()
+            print(f"📦 Translation memory: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.1%} hit rate, {stats['size']} entries)")
+            self.memory.close()
+        METRICS.report()
+        return written
+
+
+def run_streaming(input_csv, output_csv, api_key, target_languages=None, chunksize=PIPELINE_CONFIG['chunksize'],
+                  previous_output=None):
+    """
+    Translates a CSV export chunk by chunk with bounded memory (default: every configured language).
+    With previous_output only rows changed since that earlier translated export are translated.
+    """
+    return StreamingPipeline(api_key, target_languages, chunksize, previous_output).run(input_csv, output_csv)
@@ -0,0 +1,45 @@
+import re
+import logging
+from typing import Callable, List, Sequence, Set
+from config import PREFILTER_CONFIG
+from masking import MaskedContent, PLACEHOLDER_RE
+from metrics import METRICS
+
+logger = logging.getLogger('website_translator')
+
+# Everything that is not a letter: digits, punctuation, symbols and whitespace
+_NON_LETTER_RE = re.compile(r'[\W\d_]+')
+
+
+def translatable_residue(masked_text: str) -> str:
+    """The letters left in masked text once placeholders, numbers, punctuation and whitespace are removed."""
+    return _NON_LETTER_RE.sub('', PLACEHOLDER_RE.sub('', masked_text))
+
+
+def needs_translation(masked_text: str, min_letters: int = PREFILTER_CONFIG['min_letters']) -> bool:
+    """
+    Whether masked text has anything for the model to translate. Layout-only markup, images,
+    links, URLs and numbers are all masked or non-letters, so they leave (almost) no residue.
+    """
+    return len(translatable_residue(masked_text)) >= min_letters
+
+
+def untranslatable(masked: Sequence[MaskedContent], chunked: Sequence[List[str]],
+                   estimate_tokens: Callable[[str], int], languages: int = 1) -> Set[int]:
+    """
+    Indices of masked contents with nothing to translate, which callers pass through unchanged
+    instead of sending. Counts the skipped cells and the requests and (estimated) tokens their
+    chunks would have cost in all languages under prefilter_* metrics.
+    """
+    if not PREFILTER_CONFIG['enabled']:
+        return set()
+    skipped = {index for index, item in enumerate(masked) if not needs_translation(item.text)}
+    if skipped:
+        calls = languages * sum(len(chunked[index]) for index in skipped)
+        tokens = languages * sum(estimate_tokens(chunk) for index in skipped for chunk in chunked[index])
+        METRICS.count('prefilter_skipped', len(skipped))
+        METRICS.count('prefilter_calls_avoided', calls)
+        METRICS.count('prefilter_tokens_avoided', tokens)
+        logger.info(f"Prefilter: {len(skipped)} of {len(masked)} values have no text to translate "
+                    f"({calls} requests, ~{tokens} tokens avoided).")
+    return skipped
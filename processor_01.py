@@ -2,11 +2,20 @@ import re
 import logging
 import pandas as pd
 from typing import List, Tuple
+from html_tokenizer import (tokenize, render, normalize_tokens, remove_formatting_tokens,
+                            structure_from_tokens)
+from reconstruction import reconstruct
 from config import LANGUAGE_CONFIG
 from collections import Counter
 
 logger = logging.getLogger('csv_html_processor')
 
+_INLINE_TAG_RE = re.compile(r'<(h2|p|strong|b|i|span)[^>]*>(.*?)</\1>')
+_HEADER_TAG_RE = re.compile(r'<h\d>')
+_DUPLICATE_HEADER_RE = re.compile(r'<h(\d)></h\1>\s*<h\d>')
+_HEADER_IN_P_RE = re.compile(r'<p>(<h\d>.*?</h\d>)</p>')
+_EMPTY_HEADER_RE = re.compile(r'<h\d></h\d>')
+
 
 class HTMLProcessor:
     def __init__(self):
@@ -15,18 +24,12 @@ class HTMLProcessor:
     @staticmethod
     def remove_formatting(s: str) -> str:
         """Cleans and standardizes HTML formatting while preserving structure"""
-        s = re.sub(r'\s+', ' ', s.replace("\n", " ").replace("\t", " ").replace("\r", " "))
-        s = s.replace("> <", "><").replace(" <br>", "<br>").replace("<br> ", "<br>")
-        return s
+        return render(remove_formatting_tokens(tokenize(s)))
 
     @staticmethod
     def normalize_html(content: str) -> str:
         """Standardizes HTML formatting to reduce mismatches."""
-        content = re.sub(r'\s+', ' ', content)  # Remove extra spaces
-        content = content.replace("> <", "><")  # Fix tag spacing
-        content = re.sub(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"', r'\1',
-                         content)  # Remove unnecessary attributes
-        return content
+        return render(normalize_tokens(tokenize(content)))
 
     @staticmethod
     def truncate_str(s: str, length: int = 30) -> str:
@@ -36,25 +39,40 @@ class HTMLProcessor:
     @staticmethod
     def extract_html_structure(content: str) -> List[List]:
         """Extracts HTML structure from content, preserving comments and self-closing tags."""
-        structure = []
-        pattern = re.compile(r'(<[^>]+>|<!--.*?-->|[^<]+)')
-        for match in pattern.finditer(content):
-            item = match.group(1)
-            end_position = match.end()
-            if item.strip():
-                structure.append([item, item.startswith('<') and item.endswith('>'), end_position])
-        return structure
+        return structure_from_tokens(content, tokenize(content))
 
     @staticmethod
     def extract_translatable_text(content: str) -> str:
         """Extracts only translatable text while preserving inline content in allowed tags."""
-        return re.sub(r'<(h2|p|strong|b|i|span)[^>]*>(.*?)</\1>', r'\2', content)
+        return _INLINE_TAG_RE.sub(r'\2', content)
+
+    @staticmethod
+    def clean_headers(result: str) -> str:
+        """Removes empty/duplicate headers and moves headers out of <p> wrappers."""
+        # Remove duplicate and empty headers like <h2></h2><h2>Title</h2>
+        result = _DUPLICATE_HEADER_RE.sub('<h\1>', result)
+
+        # Correct misplaced closing tags (e.g., <p><h2>...</p></h2>)
+        result = _HEADER_IN_P_RE.sub(r'\1', result)  # Move headers out of <p>
+        result = _EMPTY_HEADER_RE.sub('', result)  # Remove empty header tags
+
+        # Ensure correct nesting: move misplaced <h2> out of <p>
+        result = _HEADER_IN_P_RE.sub(r'\1', result)
+        result = _EMPTY_HEADER_RE.sub('', result)  # Remove empty headers
+        return result
 
     @staticmethod
     def reconstruct_html_from_structure(original_structure: List[List], translated_content: str) -> str:
         """Reconstructs HTML content while preserving original structure, ensuring correct tag placement."""
+        # The header cleanup can only match '<hN>' tags. Without any, it never changes the
+        # result and the segment-buffer engine produces the same output in linear time.
+        if not _HEADER_TAG_RE.search(translated_content) and not any(
+                item[1] and _HEADER_TAG_RE.search(item[0]) for item in original_structure):
+            return reconstruct(original_structure, translated_content)
+
         result = translated_content
         search_start = 0
+        cleaned = False  # True while result is unchanged since the last cleanup pass
 
         for item in original_structure:
             if item[1]:  # is HTML tag or comment, leave it alone
@@ -62,36 +80,14 @@ class HTMLProcessor:
                 if tag_position != -1:
                     result = result[:tag_position] + item[0] + result[tag_position:]
                     search_start = tag_position + len(item[0])
+                    cleaned = False
                 continue
 
-            # Ensure extracted translatable text is placed back inside its original tag
-            if re.match(r'<(button|label|title|span|h1|h2|h3|p|strong|b|i)>', item[0]):
-                tag_name = re.match(r'<(\w+)', item[0]).group(1)
-                inner_text = HTMLProcessor.extract_translatable_text(item[0])
-                if inner_text.strip():  # Only keep the tag if it has meaningful content
-                    result = result.replace(item[0], f'<{tag_name}>{inner_text}</{tag_name}>')
-                else:
-                    # If an empty tag is inside a meaningful parent, remove only the empty child
-                    result = re.sub(rf'<{tag_name}[^>]*></{tag_name}>', '', result)
-                continue
-
-            # Remove duplicate and empty headers like <h2></h2><h2>Title</h2>
-            result = re.sub(r'<h(\d)></h\1>\s*<h\d>', '<h\1>', result)
-
-            # Correct misplaced closing tags (e.g., <p><h2>...</p></h2>)
-            result = re.sub(r'<p>(<h\d>.*?</h\d>)</p>', r'\1', result)  # Move headers out of <p>
-            result = re.sub(r'<h\d></h\d>', '', result)  # Remove empty header tags
-
-            # Ensure correct nesting: move misplaced <h2> out of <p>
-            result = re.sub(r'<p>(<h\d>.*?</h\d>)</p>', r'\1', result)
-            result = re.sub(r'<h\d></h\d>', '', result)  # Remove empty headers
-
-            # Keep <a> tags intact but allow text inside them to be translated
-            if item[0].startswith("<a ") and item[0].endswith("</a>"):
-                inner_text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', item[0])
-                translated_inner = HTMLProcessor.extract_translatable_text(inner_text)
-                result = result.replace(inner_text, translated_inner)
-                continue
+            # Re-running the cleanup on an unchanged string is a no-op, so skip it
+            if not cleaned:
+                cleaned_result = HTMLProcessor.clean_headers(result)
+                cleaned = cleaned_result == result
+                result = cleaned_result
 
         return result
 
@@ -0,0 +1,63 @@
+from typing import List, Sequence, Tuple
+from html_structure import HTMLStructure
+
+
+class SegmentBuffer:
+    """Collects insertions into a base string and assembles the output once."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.insertions: List[Tuple[int, str]] = []
+
+    def insert(self, position: int, text: str):
+        """Queues text to be inserted before base[position]; equal positions keep insertion order."""
+        self.insertions.append((position, text))
+
+    def render(self) -> str:
+        """Builds the final string in a single pass over base and the queued segments."""
+        if not self.insertions:
+            return self.base
+        # Positions are produced in non-decreasing order by the reconstruction loop;
+        # the stable sort only matters for callers that insert out of order.
+        insertions = sorted(self.insertions, key=lambda item: item[0])
+        parts = []
+        last = 0
+        for position, text in insertions:
+            parts.append(self.base[last:position])
+            parts.append(text)
+            last = position
+        parts.append(self.base[last:])
+        return ''.join(parts)
+
+
+def tag_insertion_points(original_structure: Sequence[Sequence], translated_content: str) -> List[Tuple[int, str]]:
+    """
+    Computes where each structure tag lands in translated_content, in the coordinates of
+    the unmodified string.
+
+    The legacy splice loop inserts a tag before the next '<' at or after search_start and
+    then moves search_start to just past the inserted tag, i.e. back onto the same '<'.
+    Tracking that cursor in original coordinates gives the same positions without
+    rebuilding the string for every tag.
+    """
+    points = []
+    cursor = 0
+    if isinstance(original_structure, HTMLStructure):
+        tags = original_structure.tags()
+    else:
+        tags = (item[0] for item in original_structure if item[1])
+    for tag in tags:
+        position = translated_content.find("<", cursor)
+        if position == -1:
+            break
+        points.append((position, tag))
+        cursor = position
+    return points
+
+
+def reconstruct(original_structure: Sequence[Sequence], translated_content: str) -> str:
+    """Linear-time equivalent of HTMLProcessor.reconstruct_html_from_structure."""
+    buffer = SegmentBuffer(translated_content)
+    for position, tag in tag_insertion_points(original_structure, translated_content):
+        buffer.insert(position, tag)
+    return buffer.render()
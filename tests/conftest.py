@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def offline_config(monkeypatch):
+    """No shared on-disk translation memory (it would answer requests from earlier runs) and an instant mock API."""
+    monkeypatch.setitem(config.CACHE_CONFIG, 'enabled', False)
+    monkeypatch.setitem(config.BACKEND_CONFIG, 'backend', 'mock')
+    monkeypatch.setitem(config.BACKEND_CONFIG, 'mock', {**config.BACKEND_CONFIG['mock'], 'latency': 0.0,
+                                                        'latency_jitter': 0.0})
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """A local chat-completions endpoint that echoes the content upper-cased; the first request gets a 429."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        if len(self.server.requests) == 1:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {"retry-after-ms": "20"})
+            return
+        content = body["messages"][-1]["content"].rsplit("Content:", 1)[1].strip()
+        self._send(200, {
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content.upper()},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def chat_server():
+    """The server above on a free port; .url is its base_url and .requests the request bodies it received."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
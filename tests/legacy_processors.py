@@ -0,0 +1,250 @@
+"""
+The regex implementations the tokenizer-based processors replaced, copied from the original
+HTML_in_CSV_Processor.py, processor.py and processor_01.py (without their CSV methods). The
+regression tests compare the current code against them.
+"""
+import re
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger('csv_html_processor')
+
+
+class LegacyCSVProcessor:
+    @staticmethod
+    def remove_formatting(s: str) -> str:
+        """Cleans and standardizes HTML formatting while preserving structure"""
+        s = re.sub(r'\s+', ' ', s.replace("\n", " ").replace("\t", " ").replace("\r", " "))
+        s = s.replace("> <", "><").replace(" <br>", "<br>").replace("<br> ", "<br>")
+        return s
+
+    @staticmethod
+    def normalize_html(content: str) -> str:
+        """Standardizes HTML formatting to reduce mismatches."""
+        content = re.sub(r'\s+', ' ', content)  # Remove extra spaces
+        content = content.replace("> <", "><")  # Fix tag spacing
+        content = re.sub(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"', r'\1',
+                         content)  # Remove unnecessary attributes
+        return content
+
+    @staticmethod
+    def truncate_str(s: str, length: int = 30) -> str:
+        """Truncates string with ellipsis in middle if too long"""
+        return f"{s[:length]}...{s[-length:]}" if len(s) > length * 2 else s
+
+    @staticmethod
+    def extract_html_structure(content: str) -> List[List]:
+        """Extracts HTML structure from content, preserving comments and self-closing tags."""
+        structure = []
+        pattern = re.compile(r'(<[^>]+>|<!--.*?-->|[^<]+)')
+        for match in pattern.finditer(content):
+            item = match.group(1)
+            end_position = match.end()
+            if item.strip():
+                structure.append([item, item.startswith('<') and item.endswith('>'), end_position])
+        return structure
+
+    @staticmethod
+    def extract_translatable_text(content: str) -> str:
+        """Extracts only translatable text from HTML while preserving structure."""
+        return re.sub(r'<[^>]+>', '', content).strip()
+
+    @staticmethod
+    def validate_html_structure(original_structure: List[List], translated_content: str, start_position: int,
+                                leftover: str) -> Tuple[int, str]:
+        """Validates translated content against original HTML structure."""
+        translated_structure = LegacyCSVProcessor.extract_html_structure(leftover + translated_content)
+
+        for i, (orig, trans) in enumerate(zip(original_structure[start_position:], translated_structure)):
+            if orig[1] != trans[1] or (
+                    orig[1] and re.split(r'[\s>]', orig[0])[0].lower() != re.split(r'[\s>]', trans[0])[0].lower()):
+                logger.error(f"Structure mismatch: Original {start_position}-{start_position + i} | Translated 0-{i}")
+                return start_position, leftover  # Avoid raising error, return as is
+
+        end_position = start_position + len(translated_structure)
+        leftover = "" if translated_structure[-1][1] else leftover
+        if not translated_structure[-1][1]:
+            end_position -= 1
+
+        return end_position, leftover
+
+    @staticmethod
+    def reconstruct_html_from_structure(original_structure: List[List], translated_content: str) -> str:
+        """Reconstructs HTML content while preserving original structure, but only translating necessary parts."""
+        result = translated_content
+        search_start = 0
+
+        for item in original_structure:
+            if item[1]:  # is HTML tag or comment, leave it alone
+                tag_position = result.find("<", search_start)
+                if tag_position != -1:
+                    result = result[:tag_position] + item[0] + result[tag_position:]
+                    search_start = tag_position + len(item[0])
+                continue
+
+            # Allow translatable text inside specific tags
+            if re.match(r'<(button|label|title|span|h1|h2|h3|p)>', item[0]):
+                result = result.replace(item[0], LegacyCSVProcessor.extract_translatable_text(item[0]))
+                continue
+
+            # Keep <a> tags intact but allow text inside them to be translated
+            if item[0].startswith("<a ") and item[0].endswith("</a>"):
+                inner_text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', item[0])
+                translated_inner = LegacyCSVProcessor.extract_translatable_text(inner_text)
+                result = result.replace(inner_text, translated_inner)
+                continue
+
+        return result
+
+
+class LegacyProcessor:
+    @staticmethod
+    def remove_formatting(s: str) -> str:
+        """Cleans and standardizes HTML formatting while preserving structure."""
+        s = re.sub(r'\s+', ' ', s.replace("\n", " ").replace("\t", " ").replace("\r", " "))
+        s = s.replace("> <", "><").replace(" <br>", "<br>").replace("<br> ", "<br>")
+        return s
+
+    @staticmethod
+    def normalize_html(content: str) -> str:
+        """Standardizes HTML formatting to reduce mismatches."""
+        content = re.sub(r'\s+', ' ', content)  # Remove extra spaces
+        content = content.replace("> <", "><")  # Fix tag spacing
+        content = re.sub(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"', r'\1', content)  # Remove unnecessary attributes
+        return content
+
+    @staticmethod
+    def extract_html_structure(content: str) -> List[List]:
+        """Extracts HTML structure from content, preserving comments and self-closing tags."""
+        structure = []
+        pattern = re.compile(r'(<[^>]+>|<!--.*?-->|[^<]+)')
+        for match in pattern.finditer(content):
+            item = match.group(1)
+            if item.strip():
+                structure.append([item, item.startswith('<') and item.endswith('>')])
+        return structure
+
+    @staticmethod
+    def extract_translatable_text(content: str) -> str:
+        """Extracts only translatable text while preserving inline content in allowed tags."""
+        text = re.sub(r'<(h2|p|strong|b|i|span)[^>]*>(.*?)</\1>', r'\2', content)
+        text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', text)  # Keep text inside <a>
+        return text
+
+    @staticmethod
+    def reconstruct_html_from_structure(original_structure: List[List], translated_content: str) -> str:
+        """
+        Reconstructs HTML content while preserving original structure,
+        only replacing translatable text without altering the HTML tags.
+        """
+        result = translated_content
+        search_start = 0
+
+        for item in original_structure:
+            if item[1]:  # is an HTML tag, keep it intact
+                tag_position = result.find("<", search_start)
+                if tag_position != -1:
+                    result = result[:tag_position] + item[0] + result[tag_position:]
+                    search_start = tag_position + len(item[0])
+                continue
+
+            # Ensure extracted translatable text is placed back inside its original tag
+            if re.match(r'<(h2|p|strong|b|i|span|button|label|title)>', item[0]):
+                tag_name = re.match(r'<(\w+)', item[0]).group(1)
+                inner_text = LegacyProcessor.extract_translatable_text(item[0])
+                if inner_text.strip():  # Only keep the tag if it has meaningful content
+                    result = result.replace(item[0], f'<{tag_name}>{inner_text}</{tag_name}>')
+
+            # Keep <a> tags intact but allow text inside them to be translated
+            if item[0].startswith("<a ") and item[0].endswith("</a>"):
+                inner_text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', item[0])
+                translated_inner = LegacyProcessor.extract_translatable_text(inner_text)
+                result = result.replace(inner_text, translated_inner)
+                continue
+
+        return result
+
+
+class LegacyProcessor01:
+    @staticmethod
+    def remove_formatting(s: str) -> str:
+        """Cleans and standardizes HTML formatting while preserving structure"""
+        s = re.sub(r'\s+', ' ', s.replace("\n", " ").replace("\t", " ").replace("\r", " "))
+        s = s.replace("> <", "><").replace(" <br>", "<br>").replace("<br> ", "<br>")
+        return s
+
+    @staticmethod
+    def normalize_html(content: str) -> str:
+        """Standardizes HTML formatting to reduce mismatches."""
+        content = re.sub(r'\s+', ' ', content)  # Remove extra spaces
+        content = content.replace("> <", "><")  # Fix tag spacing
+        content = re.sub(r'(<[^>]+) (target|rel|class|id|style)="[^"]*"', r'\1',
+                         content)  # Remove unnecessary attributes
+        return content
+
+    @staticmethod
+    def truncate_str(s: str, length: int = 30) -> str:
+        """Truncates string with ellipsis in middle if too long"""
+        return f"{s[:length]}...{s[-length:]}" if len(s) > length * 2 else s
+
+    @staticmethod
+    def extract_html_structure(content: str) -> List[List]:
+        """Extracts HTML structure from content, preserving comments and self-closing tags."""
+        structure = []
+        pattern = re.compile(r'(<[^>]+>|<!--.*?-->|[^<]+)')
+        for match in pattern.finditer(content):
+            item = match.group(1)
+            end_position = match.end()
+            if item.strip():
+                structure.append([item, item.startswith('<') and item.endswith('>'), end_position])
+        return structure
+
+    @staticmethod
+    def extract_translatable_text(content: str) -> str:
+        """Extracts only translatable text while preserving inline content in allowed tags."""
+        return re.sub(r'<(h2|p|strong|b|i|span)[^>]*>(.*?)</\1>', r'\2', content)
+
+    @staticmethod
+    def reconstruct_html_from_structure(original_structure: List[List], translated_content: str) -> str:
+        """Reconstructs HTML content while preserving original structure, ensuring correct tag placement."""
+        result = translated_content
+        search_start = 0
+
+        for item in original_structure:
+            if item[1]:  # is HTML tag or comment, leave it alone
+                tag_position = result.find("<", search_start)
+                if tag_position != -1:
+                    result = result[:tag_position] + item[0] + result[tag_position:]
+                    search_start = tag_position + len(item[0])
+                continue
+
+            # Ensure extracted translatable text is placed back inside its original tag
+            if re.match(r'<(button|label|title|span|h1|h2|h3|p|strong|b|i)>', item[0]):
+                tag_name = re.match(r'<(\w+)', item[0]).group(1)
+                inner_text = LegacyProcessor01.extract_translatable_text(item[0])
+                if inner_text.strip():  # Only keep the tag if it has meaningful content
+                    result = result.replace(item[0], f'<{tag_name}>{inner_text}</{tag_name}>')
+                else:
+                    # If an empty tag is inside a meaningful parent, remove only the empty child
+                    result = re.sub(rf'<{tag_name}[^>]*></{tag_name}>', '', result)
+                continue
+
+            # Remove duplicate and empty headers like <h2></h2><h2>Title</h2>
+            result = re.sub(r'<h(\d)></h\1>\s*<h\d>', '<h\1>', result)
+
+            # Correct misplaced closing tags (e.g., <p><h2>...</p></h2>)
+            result = re.sub(r'<p>(<h\d>.*?</h\d>)</p>', r'\1', result)  # Move headers out of <p>
+            result = re.sub(r'<h\d></h\d>', '', result)  # Remove empty header tags
+
+            # Ensure correct nesting: move misplaced <h2> out of <p>
+            result = re.sub(r'<p>(<h\d>.*?</h\d>)</p>', r'\1', result)
+            result = re.sub(r'<h\d></h\d>', '', result)  # Remove empty headers
+
+            # Keep <a> tags intact but allow text inside them to be translated
+            if item[0].startswith("<a ") and item[0].endswith("</a>"):
+                inner_text = re.sub(r'<a[^>]*>(.*?)</a>', r'\1', item[0])
+                translated_inner = LegacyProcessor01.extract_translatable_text(inner_text)
+                result = result.replace(inner_text, translated_inner)
+                continue
+
+        return result
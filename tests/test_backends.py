@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+import config
+from backends import MockBackend, OpenAIAsyncBackend, RetryableError, create_backend
+from translation_engine import AsyncTranslationEngine
+from HTML_in_CSV_Processor import HTMLProcessor
+from translator import structure_mismatches, translate_targets
+
+VALUES = ['<p>Merhaba <b>dünya</b></p>',
+          '<div class="promo"><h2>Yeni ürünler</h2><p>Şimdi <a href="/x">indirimde</a>!</p></div>',
+          'Düz metin',
+          '<img src="logo.png"><br>']
+
+
+def outcomes(backend, keys):
+    """Per request key, the failure raised or 'ok', with the requests issued concurrently in the given order."""
+    async def attempt(key):
+        try:
+            await backend.translate(key, "EN")
+            return "ok"
+        except RetryableError as e:
+            return str(e)
+
+    async def run():
+        return await asyncio.gather(*(attempt(key) for key in keys))
+
+    return dict(zip(keys, asyncio.run(run())))
+
+
+def test_mock_round_trip_through_masking_and_reconstruction():
+    engine = AsyncTranslationEngine(MockBackend(latency=0.0, latency_jitter=0.0))
+    results = translate_targets(VALUES, engine, ["EN", "DE"], HTMLProcessor())
+    engine.close()
+
+    for language in ("EN", "DE"):
+        assert results[language] == [MockBackend.mock_translate(value) for value in VALUES]
+        assert structure_mismatches(VALUES, results[language]) == []
+    assert results["EN"][1] == ('<div class="promo"><h2>YENI ÜRÜNLER</h2><p>ŞIMDI <a href="/x">INDIRIMDE</a>!</p>'
+                                '</div>')
+
+
+def test_mock_failures_repeat_whatever_the_scheduling():
+    keys = [f"<p>segment {n}</p>" for n in range(50)]
+    first = outcomes(MockBackend(latency=0.0, latency_jitter=0.0, failure_rate=0.3, rate_limit_rate=0.2, seed=5), keys)
+    second = outcomes(MockBackend(latency=0.0, latency_jitter=0.0, failure_rate=0.3, rate_limit_rate=0.2, seed=5),
+                      keys[::-1])
+    assert first == second
+    assert {"ok", "Mock transient failure", "Mock rate limit"} == set(first.values())
+
+    other_seed = outcomes(MockBackend(latency=0.0, latency_jitter=0.0, failure_rate=0.3, rate_limit_rate=0.2, seed=6),
+                          keys)
+    assert other_seed != first
+
+
+def test_create_backend_reads_the_config_at_call_time(monkeypatch):
+    monkeypatch.setitem(config.BACKEND_CONFIG, 'mock', {**config.BACKEND_CONFIG['mock'], 'failure_rate': 0.25})
+    backend = create_backend()
+    assert isinstance(backend, MockBackend)
+    assert backend.failure_rate == 0.25
+    assert create_backend('mock', failure_rate=0.5).failure_rate == 0.5
+    with pytest.raises(ValueError):
+        create_backend('unknown')
+
+
+def test_openai_client_is_kept_across_calls_and_closed_with_the_engine(chat_server):
+    pytest.importorskip("openai")
+    backend = OpenAIAsyncBackend("test-key", model="gpt-test", base_url=chat_server.url, stream=False)
+    engine = AsyncTranslationEngine(backend, max_retries=2)
+
+    assert engine.translate_all(["<p>bir</p>"], "EN") == ["<P>BIR</P>"]
+    client = backend.client
+    assert engine.translate_all(["<p>iki</p>", "<p>üç</p>"], "EN") == ["<P>IKI</P>", "<P>ÜÇ</P>"]
+    assert backend.client is client
+
+    engine.close()
+    assert backend.client is None
+    assert len(chat_server.requests) == 4
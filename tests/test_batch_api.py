@@ -0,0 +1,45 @@
+import os
+import json
+from backends import OpenAIAsyncBackend, estimate_chat_tokens
+from batch_api import batch_segments, build_batch_job, ingest_batch_output, read_batch_output
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+INPUT_CSV = os.path.join(FIXTURES, "batch_input.csv")
+OUTPUT_JSONL = os.path.join(FIXTURES, "batch_output.jsonl")
+
+
+def test_build_batch_job_requests_every_translatable_segment(tmp_path):
+    paths = build_batch_job(INPUT_CSV, str(tmp_path / "requests.jsonl"), ["EN"])
+
+    with open(paths[0], encoding='utf-8') as requests_file:
+        requests = [json.loads(line) for line in requests_file]
+    assert {request["custom_id"] for request in requests} == set(read_batch_output([OUTPUT_JSONL]))
+    assert all(request["url"] == "/v1/chat/completions" for request in requests)
+
+
+def test_ingest_batch_output_reconstructs_html(tmp_path):
+    df = ingest_batch_output(INPUT_CSV, [OUTPUT_JSONL], str(tmp_path / "translated.csv"), ["EN"])
+
+    assert df["VALUE_EN"].tolist() == [
+        "<p>Hello world</p>",
+        "<div><h2>New products</h2><p>Now <b>on sale</b>!</p></div>",
+        "Sadece metin",  # PLAIN_TEXT is not translated
+    ]
+    assert os.path.exists(tmp_path / "translated.csv")
+
+
+def test_ingest_batch_output_marks_missing_segments_as_errors(tmp_path):
+    partial = tmp_path / "partial_output.jsonl"
+    with open(OUTPUT_JSONL, encoding='utf-8') as output_file:
+        partial.write_text(output_file.readline(), encoding='utf-8')
+
+    df = ingest_batch_output(INPUT_CSV, [str(partial)], str(tmp_path / "translated.csv"), ["EN"])
+
+    assert df["VALUE_EN"].iloc[0] == "<p>Hello world</p>"
+    assert df["VALUE_EN"].iloc[1].startswith("ERROR:")
+
+
+def test_batch_segments_estimate_tokens_like_the_openai_backend():
+    values = ["<p>Merhaba dünya</p>", "<div><img src='x.png'></div>", "<p>" + "uzun metin " * 400 + "</p>"]
+    assert all(estimate_chat_tokens(value) == OpenAIAsyncBackend(None).estimate_tokens(value) for value in values)
+    assert batch_segments(values) == ["[[0]]Merhaba dünya[[1]]", "[[0]]" + "uzun metin " * 400 + "[[1]]"]
@@ -0,0 +1,31 @@
+import random
+import config
+from chunker import chunk_html
+from masking import PLACEHOLDER_RE, mask_html
+
+BIG = 10 ** 6  # A token budget that never binds, so only max_chars splits
+
+
+def test_hard_limit_never_cuts_a_placeholder():
+    for content in ["[[1234567]]" + "y" * 30, "x" * 45 + "[[123]]" + "y" * 100]:
+        chunks = chunk_html(content, max_chars=5 if content.startswith("[[") else 50, max_tokens=BIG)
+        assert "".join(chunks) == content
+        assert sum(len(PLACEHOLDER_RE.findall(chunk)) for chunk in chunks) == 1, chunks
+
+
+def test_masked_text_chunks_keep_every_placeholder_whole():
+    rnd = random.Random(8)
+    words = ["<b>kalın</b>", "<a href='/x'>bağlantı</a>", "metin", "uzunkelimelerdizisi", "<br>", "&amp;", "."]
+    for _ in range(300):
+        masked = mask_html("".join(rnd.choice(words) for _ in range(rnd.randint(5, 40)))).text
+        chunks = chunk_html(masked, max_chars=rnd.randint(8, 40), max_tokens=BIG)
+        assert "".join(chunks) == masked
+        assert sum(len(PLACEHOLDER_RE.findall(chunk)) for chunk in chunks) == len(PLACEHOLDER_RE.findall(masked))
+
+
+def test_separator_window_is_searched_before_the_hard_limit(monkeypatch):
+    content = "x" * 10 + ". " + "y" * 100
+    monkeypatch.setitem(config.TRANSLATION_CONFIG, 'separator_window', 5)
+    assert chunk_html(content, max_chars=50, max_tokens=BIG)[0] == content[:50]
+    monkeypatch.setitem(config.TRANSLATION_CONFIG, 'separator_window', 45)
+    assert chunk_html(content, max_chars=50, max_tokens=BIG)[0] == "x" * 10 + ". "
@@ -0,0 +1,95 @@
+import random
+import pytest
+import pandas as pd
+from content_classifier import CSS_JS_TAGS, FULL_HTML_TAGS, RICH_TEXT_TAGS, classify_content
+
+BeautifulSoup = pytest.importorskip("bs4").BeautifulSoup
+
+
+def classify_content_soup(text):
+    """The BeautifulSoup classifier classify_content replaced; its labels are the reference."""
+    if pd.isna(text) or not text.strip():
+        return "EMPTY"
+
+    soup = BeautifulSoup(text, "html.parser")
+
+    # Identify CSS/JS content
+    if any(tag.name in CSS_JS_TAGS for tag in soup.find_all()):
+        return "CSS/JS"
+
+    # Identify FULL_HTML (heavy structure)
+    if any(tag.name in FULL_HTML_TAGS for tag in soup.find_all()):
+        return "FULL_HTML"
+
+    # Identify RICH_TEXT (inline formatting and readable text)
+    if any(tag.name in RICH_TEXT_TAGS for tag in soup.find_all()):
+        return "RICH_TEXT"
+
+    # If it's only an image or a simple tag, classify as rich text
+    if soup.find("img") or soup.find("hr") or soup.find("br"):
+        return "RICH_TEXT"
+
+    # If it has no recognizable HTML, it's plain text
+    if not soup.find():
+        return "PLAIN_TEXT"
+
+    return "UNKNOWN"
+
+
+CORPUS = [
+    "Merhaba dünya",
+    "",
+    "   ",
+    "<p>Merhaba <b>dünya</b></p>",
+    "<div class=\"promo\"><h2>Yeni ürünler</h2><p>Şimdi <a href=\"/x\">indirimde</a>!</p></div>",
+    "<table><tr><td>1</td></tr></table>",
+    "<style>p { color: red; }</style><p>Metin</p>",
+    "<p>Önce</p><script>var a = \"<div>\";</script>",
+    "<img src=\"x.png\" alt=\"Logo\">",
+    "<br/>",
+    "<title>Başlık</title>",
+    "<custom-element>İçerik</custom-element>",
+    "x &lt; y ve y &gt; z",
+    "a < b ve c > d",
+    "< p>boşluklu</p>",
+    "<3 sevgiler",
+    "<!-- <div>yorum</div> --><p>görünür</p>",
+    "<!-- yorum > <div> -->",
+    "<!DOCTYPE html><html><body><section>Bölüm</section></body></html>",
+    "<![CDATA[<div>]]><span>x</span>",
+    "<?xml version=\"1.0\"?><p>x</p>",
+    "<a title=\"x>y\" href='z'>bağlantı</a>",
+    "<div",
+    "<p>kapanmamış <b",
+    "&amp;&#39;&#x4e;&nbsp",
+    "<textarea><div></textarea>",
+    "<P CLASS=X>BÜYÜK</P>",
+    "<div<p>iç içe",
+    "<span/>tek",
+]
+
+# Fragments that exercise html.parser's corner cases (unterminated tags, comments, refs, doctypes)
+_PIECES = ['<div>', '</div>', '<b>', 'text', '<', '>', '&', '&amp', '&#', '&#x4', '<!--', '-->', '<script>',
+           '</script>', '<style>', '<img src=x>', '<br/>', '<p class="a">', "<a href='x'>", '<x',
+           '<!DOCTYPE html>', '<![CDATA[', ']]>', '<?x>', '</', '=', '"', ' ', '<title>', '</title>',
+           '<textarea>', '<span/>', '<table', '<h1 >', '\n', '<foo bar>']
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_labels_match_beautifulsoup_on_corpus(text):
+    assert classify_content(text) == classify_content_soup(text)
+
+
+def test_labels_match_beautifulsoup_on_random_fragments():
+    rnd = random.Random(2)
+    mismatches = []
+    for _ in range(5000):
+        text = "".join(rnd.choice(_PIECES) for _ in range(rnd.randint(1, 8)))
+        if classify_content(text) != classify_content_soup(text):
+            mismatches.append(text)
+    assert mismatches == []
+
+
+def test_missing_values_are_empty():
+    assert classify_content(None) == "EMPTY"
+    assert classify_content(float("nan")) == "EMPTY"
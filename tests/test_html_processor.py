@@ -0,0 +1,70 @@
+import random
+import pytest
+import processor
+import processor_01
+from HTML_in_CSV_Processor import HTMLProcessor
+from legacy_processors import LegacyCSVProcessor, LegacyProcessor, LegacyProcessor01
+
+# Fragments covering tags, attributes, comments, entities, stray '<'/'>' and whitespace runs
+_PIECES = ['<p>', '</p>', '<br>', '<BR/>', '<br/>', ' <br> ', '<h2>', '</h2>', '<h3>', '</h3>', '<a href="x">',
+           '<a class="x" href="y">', '</a>', '<div class="a">', '<div id="d" style="s">', '</div>', '<span>',
+           '</span>', '<b>', '</b>', '<strong>', '</strong>', '<!-- c -->', '&amp;', '&#39;', '&', '<', '>', '> <',
+           ' ', '  ', '\n', '\t', 'text', 'Merhaba', 'dünya', 'x;', '<p\tx>', '<img src="i.png">']
+
+LANDING_PAGE = "".join(
+    f'<div class="block"><h2>Başlık {n}</h2><p>Metin <b>kalın</b> ve <a href="/l{n}">bağlantı</a>.</p>'
+    f'<!-- blok {n} --><br><span>Not {n}</span></div>\n'
+    for n in range(100))
+
+
+def fragments(seed, count, pieces=_PIECES, length=14):
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(pieces) for _ in range(rnd.randint(1, length))) for _ in range(count)]
+
+
+def outcome(function, *args):
+    """The result, or the exception type, so that both implementations can be compared on bad input."""
+    try:
+        return function(*args)
+    except IndexError as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("current, legacy", [(HTMLProcessor, LegacyCSVProcessor),
+                                             (processor.HTMLProcessor, LegacyProcessor),
+                                             (processor_01.HTMLProcessor, LegacyProcessor01)])
+def test_text_functions_match_the_regex_implementations(current, legacy):
+    for content in fragments(1, 3000) + [LANDING_PAGE]:
+        assert current.remove_formatting(content) == legacy.remove_formatting(content), content
+        assert current.normalize_html(content) == legacy.normalize_html(content), content
+        assert current.extract_translatable_text(content) == legacy.extract_translatable_text(content), content
+
+
+@pytest.mark.parametrize("current, legacy", [(HTMLProcessor, LegacyCSVProcessor),
+                                             (processor.HTMLProcessor, LegacyProcessor),
+                                             (processor_01.HTMLProcessor, LegacyProcessor01)])
+def test_structure_and_reconstruction_are_byte_identical(current, legacy):
+    sources = fragments(2, 3000) + [LANDING_PAGE]
+    translations = fragments(3, 3000) + [LANDING_PAGE.upper()]
+    for source, translated in zip(sources, translations):
+        structure = current.extract_html_structure(source)
+        legacy_structure = legacy.extract_html_structure(source)
+        assert [list(item) for item in structure] == legacy_structure, source
+        for content in (source, translated):
+            assert (current.reconstruct_html_from_structure(structure, content)
+                    == legacy.reconstruct_html_from_structure(legacy_structure, content)), (source, content)
+
+
+def test_validation_matches_the_regex_implementation():
+    rnd = random.Random(4)
+    for source, translated in zip(fragments(5, 3000), fragments(6, 3000)):
+        if rnd.random() < 0.5:
+            translated = source
+        legacy_structure = LegacyCSVProcessor.extract_html_structure(source)
+        start = rnd.randint(0, len(legacy_structure))
+        leftover = rnd.choice(["", "x ", "<b>"])
+        expected = outcome(LegacyCSVProcessor.validate_html_structure, legacy_structure, translated, start, leftover)
+        structure = HTMLProcessor.extract_html_structure(source)
+        assert outcome(HTMLProcessor.validate_html_structure, structure, translated, start, leftover) == expected
+        # Legacy [item, is_tag, end] lists are still accepted
+        assert outcome(HTMLProcessor.validate_html_structure, legacy_structure, translated, start, leftover) == expected
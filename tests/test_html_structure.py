@@ -0,0 +1,101 @@
+import sys
+import pickle
+import random
+import pytest
+from html_tokenizer import tokenize
+from html_structure import HTMLStructure, StructureMonitor
+from legacy_processors import LegacyCSVProcessor
+
+_PIECES = ['<p>', '</p>', '<br>', '<br/>', '<h2>', '</h2>', '<a href="x">', '</a>', '<div class="a">', '</div>',
+           '<!-- c -->', '&amp;', '&', '<', '>', ' ', '\n', 'text', 'Merhaba', '<b>', '</b>', '<p\tx>']
+
+LANDING_PAGE = "".join(
+    f'<div class="block"><h2>Başlık {n}</h2><p>Metin <b>kalın</b> ve <a href="/l{n}">bağlantı</a>.</p></div>\n'
+    for n in range(200))
+
+
+def fragments(seed, count):
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(_PIECES) for _ in range(rnd.randint(0, 14))) for _ in range(count)]
+
+
+def deep_size(items):
+    return sys.getsizeof(items) + sum(sys.getsizeof(item) + sum(sys.getsizeof(part) for part in item)
+                                      for item in items)
+
+
+def test_arrays_index_like_the_legacy_lists():
+    for content in fragments(1, 3000) + [LANDING_PAGE]:
+        structure = HTMLStructure.parse(content)
+        legacy = LegacyCSVProcessor.extract_html_structure(content)
+        assert structure.to_list() == legacy, content
+        assert HTMLStructure.from_tokens(content, tokenize(content)).to_list() == legacy, content
+        assert [structure.item(index) for index in range(len(structure))] == [item[0] for item in legacy]
+        assert [structure.is_tag(index) for index in range(len(structure))] == [item[1] for item in legacy]
+
+
+def test_slices_and_legacy_lists_convert():
+    structure = HTMLStructure.parse(LANDING_PAGE)
+    assert structure[3:9].to_list() == structure.to_list()[3:9]
+    assert structure[-1] == structure.to_list()[-1]
+
+    converted = HTMLStructure.from_items(LegacyCSVProcessor.extract_html_structure(LANDING_PAGE))
+    assert [item[:2] for item in converted] == [item[:2] for item in structure]
+    assert HTMLStructure.from_items(structure) is structure
+
+
+def test_structure_survives_pickling_for_worker_processes():
+    structure = HTMLStructure.parse(LANDING_PAGE)
+    restored = pickle.loads(pickle.dumps(structure))
+    assert restored.to_list() == structure.to_list()
+    assert restored.signature() == structure.signature()
+
+
+def test_arrays_are_several_times_smaller_than_the_lists():
+    structure = HTMLStructure.parse(LANDING_PAGE)
+    compact = sum(sys.getsizeof(column) for column in (structure.starts, structure.ends, structure.kinds))
+    assert compact * 3 < deep_size(LegacyCSVProcessor.extract_html_structure(LANDING_PAGE))
+
+
+def feed_by(monitor, reply, size):
+    """Feeds reply in deltas of size characters; the verdict after the last one."""
+    return all([monitor.feed(reply[start:start + size]) for start in range(0, len(reply), size)])
+
+
+@pytest.mark.parametrize("source, reply", [
+    ('<p>x &lt; y</p>', '<p>x < y</p>'),
+    ('<p>a &lt;b</p>', '<p>a < b</p>'),
+    ('[[0]]x &lt; y[[1]] ve a &gt; b', '[[0]]x < y[[1]] and a > b'),
+    ('<p>Fiyat <b>&lt;100 TL</b></p><!-- not -->', '<P>Price <b><100 TL</b></P><!-- note -->'),
+    ('<a href="/x?a=1&b=2">bağlantı</a>', '<a href="/x?a=1&b=2">link</a>'),
+])
+def test_monitor_accepts_text_with_a_bare_less_than(source, reply):
+    for size in (1, 2, 5, len(reply)):
+        monitor = StructureMonitor(source)
+        assert feed_by(monitor, reply, size), (size, monitor.mismatch)
+        assert monitor.matched == len(monitor.expected)
+
+
+@pytest.mark.parametrize("source, reply", [
+    ('<p>Merhaba <b>dünya</b></p>', '<p>Hello <i>world</i></p>'),
+    ('<p>Merhaba</p>', '<p>Hello</p><p>again</p>'),
+    ('[[0]]Merhaba [[1]]dünya[[2]]', '[[0]]Hello [[2]]world[[1]]'),
+    ('<p>x &lt; y</p>', '<p>x <y</p>'),
+])
+def test_monitor_aborts_on_the_first_wrong_marker(source, reply):
+    for size in (1, 3, len(reply)):
+        monitor = StructureMonitor(source)
+        assert not feed_by(monitor, reply, size)
+        assert monitor.mismatch is not None
+
+
+def test_monitor_verdict_does_not_depend_on_how_the_reply_is_split():
+    sources, replies = fragments(5, 1000), fragments(6, 1000)
+    for source, reply in zip(sources, replies):
+        whole = StructureMonitor(source)
+        verdict = whole.feed(reply)
+        for size in (1, 4):
+            monitor = StructureMonitor(source)
+            assert feed_by(monitor, reply, size) == verdict, (source, reply, size)
+            assert monitor.mismatch == whole.mismatch
+        assert StructureMonitor(source).feed(source), source
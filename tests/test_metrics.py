@@ -0,0 +1,54 @@
+import threading
+from metrics import Metrics
+
+
+def test_updates_from_threads_are_not_lost_while_summaries_are_taken():
+    metrics = Metrics(enabled=True)
+    stop = threading.Event()
+    errors = []
+
+    def work(thread):
+        for n in range(2000):
+            metrics.count('api_calls')
+            metrics.count(f'thread_{thread}_{n % 50}')
+            metrics.adjust('queue', 1)
+            metrics.observe(f'latency_{n % 20}', n / 1000)
+            with metrics.stage(f'stage_{n % 30}'):
+                pass
+            metrics.adjust('queue', -1)
+
+    def read():
+        while not stop.is_set():
+            try:
+                metrics.summary()
+            except RuntimeError as e:  # "dictionary changed size during iteration"
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    workers = [threading.Thread(target=work, args=(thread,)) for thread in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    reader.join()
+
+    summary = metrics.summary()
+    assert errors == []
+    assert summary['counters']['api_calls'] == 8 * 2000
+    assert summary['queue_depth']['queue']['current'] == 0
+    assert sum(stage['calls'] for stage in summary['stages'].values()) == 8 * 2000
+    assert sum(latency['count'] for latency in summary['latency'].values()) == 8 * 2000
+
+
+def test_report_aligns_long_stage_names(capsys):
+    metrics = Metrics(enabled=True)
+    for name in ('api', 'classify_normalize', 'reconstruct'):
+        with metrics.stage(name):
+            pass
+    metrics.report()
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if 'calls)' in line]
+    assert len(lines) == 3
+    assert len({line.index('s  (') for line in lines}) == 1
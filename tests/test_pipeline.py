@@ -0,0 +1,26 @@
+import csv
+import pandas as pd
+from pipeline import run_streaming
+
+
+def test_leading_chunk_without_relevant_rows_keeps_the_output_header(tmp_path):
+    input_csv = tmp_path / "export.csv"
+    output_csv = tmp_path / "translated.csv"
+    pd.DataFrame({
+        "KEY": ["a", "b", "c", "d"],
+        "VALUE": ["Sadece metin", "Yine metin", "<p>Merhaba <b>dünya</b></p>", "<div><p>Yeni ürün</p></div>"],
+    }).to_csv(input_csv, index=False)
+
+    # The first two-row chunk is all PLAIN_TEXT, which the filter drops
+    written = run_streaming(str(input_csv), str(output_csv), None, ["EN", "DE"], chunksize=2)
+
+    with open(output_csv, encoding='utf-8', newline='') as output_file:
+        rows = list(csv.reader(output_file))
+    assert rows[0] == ["KEY", "VALUE", "CONTENT_TYPE", "VALUE_EN", "VALUE_DE", "STRUCTURE_OK_EN", "STRUCTURE_OK_DE"]
+    assert all(len(row) == len(rows[0]) for row in rows)
+    assert written == 2
+
+    df = pd.read_csv(output_csv)
+    assert df["KEY"].tolist() == ["c", "d"]
+    assert df["STRUCTURE_OK_EN"].tolist() == [True, True]
+    assert df["VALUE_EN"].iloc[0].startswith("<p>") and df["VALUE_EN"].iloc[0] != df["VALUE"].iloc[0]
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import pytest
+import translation_engine
+from metrics import METRICS
+from translation_engine import (AsyncTranslationEngine, MockBackend, OpenAIAsyncBackend, RetryableError, TokenBucket,
+                                TranslationBackend, backoff_delay)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retries at once (server retry-after values still apply)."""
+    monkeypatch.setattr(translation_engine, 'backoff_delay',
+                        lambda attempt, retry_after=None: retry_after or 0.0)
+
+
+class CountingBackend(TranslationBackend):
+    """Records the most requests it ever had in flight at once."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def translate(self, content, target_language):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.005)
+        self.in_flight -= 1
+        return content.upper()
+
+
+def test_transient_failures_and_429s_are_retried_until_every_segment_is_translated(no_backoff):
+    backend = MockBackend(latency=0.0, latency_jitter=0.0, failure_rate=0.3, rate_limit_rate=0.1, seed=3)
+    engine = AsyncTranslationEngine(backend, max_retries=20)
+    contents = [f"<p>Segment {n}</p>" for n in range(200)]
+    METRICS.reset()
+
+    translated = engine.translate_all(contents, "EN")
+    engine.close()
+
+    assert translated == [MockBackend.mock_translate(content) for content in contents]
+    assert METRICS.counters['retries'] > 0
+    assert METRICS.counters['rate_limited'] > 0
+    assert 'failed_requests' not in METRICS.counters
+
+
+def test_exhausted_retries_come_back_as_errors(no_backoff):
+    engine = AsyncTranslationEngine(MockBackend(latency=0.0, latency_jitter=0.0, failure_rate=1.0), max_retries=2)
+    METRICS.reset()
+
+    assert engine.translate_all(["<p>a</p>"], "EN") == ["ERROR: Mock transient failure"]
+    engine.close()
+    assert METRICS.counters['api_calls'] == 3
+
+
+def test_requests_in_flight_never_exceed_max_concurrency():
+    backend = CountingBackend()
+    engine = AsyncTranslationEngine(backend, max_concurrency=4)
+    engine.translate_all([f"segment {n}" for n in range(40)], "EN")
+    engine.close()
+    assert backend.max_in_flight == 4
+
+
+def test_token_bucket_waits_for_the_refill():
+    async def acquire():
+        bucket = TokenBucket(6000)  # 100 per second, starting full
+        await bucket.acquire(6000)
+        start = time.monotonic()
+        await bucket.acquire(10)
+        return time.monotonic() - start
+
+    assert 0.08 <= asyncio.run(acquire()) < 0.5
+
+
+def test_backoff_prefers_the_server_retry_after():
+    assert all(2.0 <= backoff_delay(attempt, retry_after=2.0) <= 2.2 for attempt in range(6))
+    assert all(0.0 <= backoff_delay(attempt, base=0.5, cap=4.0) <= min(4.0, 0.5 * 2 ** attempt)
+               for attempt in range(6))
+
+
+def test_openai_backend_against_a_local_server_honours_retry_after(chat_server):
+    pytest.importorskip("openai")
+    backend = OpenAIAsyncBackend("test-key", model="gpt-test", base_url=chat_server.url, stream=False)
+    engine = AsyncTranslationEngine(backend, max_retries=2)
+    METRICS.reset()
+
+    assert engine.translate_all(["<p>merhaba</p>"], "EN") == ["<P>MERHABA</P>"]
+    engine.close()
+
+    assert len(chat_server.requests) == 2
+    assert METRICS.counters['rate_limited'] == 1
+    assert METRICS.counters['tokens_out'] == 5
+
+
+def test_retryable_errors_carry_the_retry_after():
+    error = RetryableError("slow down", retry_after=1.5, rate_limited=True)
+    assert (error.retry_after, error.rate_limited) == (1.5, True)
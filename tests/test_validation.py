@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+import pandas as pd
+from backends import TranslationBackend
+from html_tokenizer import tokenize
+from html_structure import tag_signature
+from translation_engine import AsyncTranslationEngine
+from HTML_in_CSV_Processor import HTMLProcessor
+from translator import flag_structure_mismatches, structure_mismatches, translate_targets
+
+_PIECES = ['<p>', '</p>', '<P class="x">', '<br>', '<br/>', '<h2>', '</h2>', '<a href="x">', '<a href="y">', '</a>',
+           '<div>', '</div>', '<!-- c -->', '<img src="i.png">', '&amp;', '<', ' ', 'text', 'Merhaba']
+
+
+def tag_sequence(content):
+    """What a signature encodes: every tag's kind and name, in order, without attributes or text."""
+    return [(token.kind, token.name) for token in tokenize(content) if token.is_tag]
+
+
+class ReorderingBackend(TranslationBackend):
+    """Swaps the first two placeholders of a masked segment the first time it sees it, then answers correctly."""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    async def translate(self, content, target_language):
+        self.calls[content] += 1
+        if self.calls[content] == 1 and "[[1]]" in content:
+            return content.replace("[[0]]", "\0").replace("[[1]]", "[[0]]").replace("\0", "[[1]]")
+        return content.upper()
+
+
+def test_signatures_are_equal_exactly_when_the_tag_sequences_are():
+    rnd = random.Random(7)
+    fragments = ["".join(rnd.choice(_PIECES) for _ in range(rnd.randint(0, 8))) for _ in range(2000)]
+    for first, second in zip(fragments, fragments[1:] + fragments[:1]):
+        assert (tag_signature(first) == tag_signature(second)) == (tag_sequence(first) == tag_sequence(second))
+
+
+def test_mismatches_ignore_text_attributes_and_failed_translations():
+    values = ['<p>Merhaba <a href="x">dünya</a></p>', '<p>Bir</p><p>İki</p>', '<div><b>x</b></div>', '<p>y</p>']
+    translations = ['<p>Hello <a href="other">world</a></p>', '<p>One</p>Two', 'ERROR: timeout', '<P>Y</P>']
+    assert structure_mismatches(values, translations) == [1]
+
+
+def test_flagged_rows_are_marked_per_language():
+    df = pd.DataFrame({"VALUE": ["<p>a</p>", "<p>b</p>", "<p>c</p>"],
+                       "VALUE_EN": ["<p>A</p>", "B", "<p>C</p>"],
+                       "VALUE_DE": ["<p>A</p>", "<p>B</p>", "<p>C</p>"]})
+    rows = pd.Series([True, True, False])
+    df.loc[2, "VALUE_EN"] = "not translated, not selected"
+
+    assert flag_structure_mismatches(df, rows, ["EN", "DE"]) == 1
+    assert df["STRUCTURE_OK_EN"].tolist() == [True, False, True]
+    assert df["STRUCTURE_OK_DE"].tolist() == [True, True, True]
+
+
+def test_mismatched_translations_are_requested_again():
+    backend = ReorderingBackend()
+    engine = AsyncTranslationEngine(backend)
+    values = ['<p>Merhaba <b>dünya</b></p>', '<div><p>Yeni ürün</p></div>']
+
+    results = translate_targets(values, engine, ["EN"], HTMLProcessor(), retries=1)
+    engine.close()
+
+    assert results["EN"] == ['<p>MERHABA <b>DÜNYA</b></p>', '<div><p>YENI ÜRÜN</p></div>']
+    assert all(calls == 2 for calls in backend.calls.values())
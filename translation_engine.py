@@ -0,0 +1,316 @@
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from config import API_CONFIG, BATCH_CONFIG, CONCURRENCY_CONFIG
+from batch_packing import SEGMENT_OVERHEAD_TOKENS, pack_segments, segment_id
+from translation_memory import TranslationMemory
+from metrics import METRICS
+# Backends live in backends.py; re-exported here for existing imports
+from backends import (GoogleTranslatorBackend, MockBackend, OpenAIAsyncBackend, RetryableError, RouterBackend,
+                      StreamAborted, TranslationBackend, create_backend, parse_retry_after)
+
+logger = logging.getLogger('website_translator')
+
+
+def backoff_delay(attempt: int, base: float = CONCURRENCY_CONFIG['backoff_base'],
+                  cap: float = CONCURRENCY_CONFIG['backoff_max'], retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter; a server-provided retry-after takes precedence."""
+    if retry_after is not None:
+        # Up to 10% jitter so that workers released together do not retry in lockstep
+        return min(cap, retry_after) * random.uniform(1.0, 1.1)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most one minute of budget."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        """Waits until amount tokens are available and takes them."""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AsyncTranslationEngine:
+    """
+    Translates many segments concurrently under request/token rate limits with jittered retries.
+    The synchronous entry points share one event loop, and so the backend's pooled clients, until
+    close() at the end of the run.
+    """
+
+    def __init__(self, backend: TranslationBackend, memory: Optional[TranslationMemory] = None,
+                 source_language: str = 'tr',
+                 max_concurrency: int = CONCURRENCY_CONFIG['max_concurrency'],
+                 requests_per_minute: float = CONCURRENCY_CONFIG['requests_per_minute'],
+                 tokens_per_minute: float = CONCURRENCY_CONFIG['tokens_per_minute'],
+                 max_retries: int = CONCURRENCY_CONFIG['max_retries'],
+                 request_timeout: Optional[float] = CONCURRENCY_CONFIG['request_timeout']):
+        self.backend = backend
+        self.memory = memory
+        self.source_language = source_language
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0  # Shared pause after a 429 so all workers back off together
+        self._semaphore: Optional[asyncio.Semaphore] = None  # Shared across concurrent fan-out calls
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # Created on the first synchronous call
+
+    def run(self, coroutine: Awaitable):
+        """Runs coroutine to completion on the engine's persistent event loop."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
+    def close(self):
+        """Closes the backend's clients and the event loop; call once when the run ends."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.run_until_complete(self.backend.aclose())
+        self._loop.close()
+
+    async def _wait_for_pause(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _call(self, request: Callable[[], Awaitable], tokens: int):
+        """Runs one backend request under the rate limiters, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            throttled = time.perf_counter()
+            await self._wait_for_pause()
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(tokens)
+            METRICS.count('throttle_wait_seconds', time.perf_counter() - throttled)
+            METRICS.count('api_calls')
+            METRICS.adjust('api_in_flight', 1)
+            try:
+                return await asyncio.wait_for(request(), self.request_timeout)
+            except asyncio.TimeoutError:
+                METRICS.count('timeouts')
+                error = RetryableError(f"Request timed out after {self.request_timeout}s")
+            except RetryableError as e:
+                error = e
+            finally:
+                METRICS.adjust('api_in_flight', -1)
+
+            if error.rate_limited:
+                METRICS.count('rate_limited')
+            if attempt == self.max_retries:
+                METRICS.count('failed_requests')
+                logger.error(f"Translation failed after {attempt + 1} attempts: {error}")
+                raise error
+            METRICS.count('retries')
+            delay = backoff_delay(attempt, retry_after=error.retry_after)
+            if error.retry_after is not None:
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            logger.warning(f"Retrying in {delay:.1f}s (attempt {attempt + 1}): {error}")
+            await asyncio.sleep(delay)
+
+    def _cached(self, content: str, target_language: str) -> Optional[str]:
+        if self.memory is None:
+            return None
+        cached = self.memory.get(content, self.source_language, target_language, self.backend.name)
+        METRICS.count('cache_hits' if cached is not None else 'cache_misses')
+        return cached
+
+    def _remember(self, content: str, translated: str, target_language: str):
+        if self.memory is not None:
+            self.memory.put(content, translated, self.source_language, target_language, self.backend.name)
+
+    def forget(self, contents: Sequence[str], target_language: str):
+        """Drops cached translations of contents so that they are requested from the backend again."""
+        if self.memory is not None:
+            for content in contents:
+                self.memory.delete(content, self.source_language, target_language, self.backend.name)
+
+    async def translate_one(self, content: str, target_language: str) -> str:
+        """Translates one segment, returning 'ERROR: ...' once retries are exhausted."""
+        cached = self._cached(content, target_language)
+        if cached is not None:
+            return cached
+        return await self._request(content, target_language)
+
+    async def _request(self, content: str, target_language: str) -> str:
+        """translate_one for a segment already looked up in (and missing from) the memory."""
+        started = time.perf_counter()
+        try:
+            translated = await self._call(lambda: self.backend.translate(content, target_language),
+                                          self.backend.estimate_tokens(content))
+        except Exception as e:
+            if not isinstance(e, RetryableError):
+                logger.error(f"Unexpected Error: {str(e)}")
+            return f"ERROR: {e}"
+        finally:
+            METRICS.observe('segment_seconds', time.perf_counter() - started)
+
+        self._remember(content, translated, target_language)
+        return translated
+
+    async def translate_batch(self, contents: Sequence[str], target_language: str) -> List[Optional[str]]:
+        """
+        Translates several segments in one packed request. Entries the reply did not cover
+        (missing or malformed IDs, or a failed request) come back as None.
+        """
+        segments = {segment_id(position): content for position, content in enumerate(contents)}
+        tokens = sum(self.backend.estimate_tokens(content) + SEGMENT_OVERHEAD_TOKENS for content in contents)
+        started = time.perf_counter()
+        try:
+            translations = await self._call(lambda: self.backend.translate_batch(segments, target_language), tokens)
+        except Exception as e:
+            logger.error(f"Packed request of {len(contents)} segments failed: {e}")
+            return [None] * len(contents)
+        # Every segment of a packed request waits for the whole reply
+        elapsed = time.perf_counter() - started
+        for _ in contents:
+            METRICS.observe('segment_seconds', elapsed)
+
+        results = []
+        for position, content in enumerate(contents):
+            translated = translations.get(segment_id(position))
+            if translated is not None:
+                self._remember(content, translated, target_language)
+            results.append(translated)
+        return results
+
+    async def translate_many(self, contents: Sequence[str], target_language: str,
+                             progress: Optional[Callable[[int], None]] = None,
+                             cache_checked: bool = False) -> List[str]:
+        """
+        Translates contents with at most max_concurrency requests in flight; results keep input order.
+        With cache_checked, contents are known memory misses and are requested without a second lookup.
+        """
+        semaphore = self._semaphore or asyncio.Semaphore(self.max_concurrency)
+        translate = self._request if cache_checked else self.translate_one
+
+        async def worker(content: str) -> str:
+            METRICS.adjust('engine_queue', 1)
+            async with semaphore:
+                METRICS.adjust('engine_queue', -1)
+                result = await translate(content, target_language)
+            if progress is not None:
+                progress(1)
+            return result
+
+        return list(await asyncio.gather(*(worker(content) for content in contents)))
+
+    async def translate_packed(self, contents: Sequence[str], target_language: str,
+                               progress: Optional[Callable[[int], None]] = None) -> List[str]:
+        """
+        Like translate_many, but packs short segments into shared requests up to a reply budget
+        derived from API_CONFIG['max_tokens']. Segments a packed reply misses, and those the backend
+        will not batch, are sent singly.
+        """
+        if not self.backend.supports_batching:
+            return await self.translate_many(contents, target_language, progress)
+
+        results: List[Optional[str]] = [None] * len(contents)
+        short = []
+        for index, content in enumerate(contents):
+            cached = self._cached(content, target_language)
+            if cached is not None:
+                results[index] = cached
+                if progress is not None:
+                    progress(1)
+            elif (self.backend.estimate_tokens(content) <= BATCH_CONFIG['max_segment_tokens']
+                  and self.backend.batchable(content)):
+                short.append(index)
+
+        budget = int(API_CONFIG['max_tokens'] * BATCH_CONFIG['budget_fraction'])
+        # Reply size is what the budget bounds, so pack on the content length alone
+        batches = pack_segments([contents[index] for index in short], lambda content: len(content) // 4 + 1,
+                                budget, BATCH_CONFIG['max_segments'])
+        semaphore = self._semaphore or asyncio.Semaphore(self.max_concurrency)
+
+        async def batch_worker(batch: List[int]):
+            indices = [short[position] for position in batch]
+            METRICS.adjust('engine_queue', 1)
+            async with semaphore:
+                METRICS.adjust('engine_queue', -1)
+                translations = await self.translate_batch([contents[index] for index in indices], target_language)
+            for index, translated in zip(indices, translations):
+                if translated is not None:
+                    results[index] = translated
+                    if progress is not None:
+                        progress(1)
+
+        await asyncio.gather(*(batch_worker(batch) for batch in batches))
+
+        # Long segments and anything a packed reply did not cover go out one per request
+        remaining = [index for index, result in enumerate(results) if result is None]
+        if remaining:
+            logger.info(f"Translating {len(remaining)} segments individually.")
+            # Each of these already missed the memory lookup above
+            translated = await self.translate_many([contents[index] for index in remaining], target_language, progress,
+                                                   cache_checked=True)
+            for index, result in zip(remaining, translated):
+                results[index] = result
+        return results
+
+    def translate_all(self, contents: Sequence[str], target_language: str,
+                      progress: Optional[Callable[[int], None]] = None, packed: bool = False) -> List[str]:
+        """Synchronous entry point for scripts; runs translate_many (or translate_packed) on the engine's loop."""
+        if packed:
+            return self.run(self.translate_packed(contents, target_language, progress))
+        return self.run(self.translate_many(contents, target_language, progress))
+
+    def translate_all_targets(self, contents: Sequence[str], target_languages: Sequence[str],
+                              progress: Optional[Callable[[int], None]] = None,
+                              packed: bool = False) -> Dict[str, List[str]]:
+        """
+        Translates contents into every target language on one event loop. All languages share the
+        rate limiters and one max_concurrency limit, so the fan-out does not multiply the load.
+        """
+        async def translate(target_language: str) -> List[str]:
+            if packed:
+                return await self.translate_packed(contents, target_language, progress)
+            return await self.translate_many(contents, target_language, progress)
+
+        async def run() -> Dict[str, List[str]]:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            try:
+                results = await asyncio.gather(*(translate(language) for language in target_languages))
+                return dict(zip(target_languages, results))
+            finally:
+                self._semaphore = None
+
+        return self.run(run())
+
+
+class SyncTranslator:
+    """
+    Blocking facade over an AsyncTranslationEngine for sync callers. It runs on the engine's
+    persistent event loop, so the backend's pooled clients stay alive across calls until close().
+    """
+
+    def __init__(self, engine: AsyncTranslationEngine):
+        self.engine = engine
+
+    def translate(self, content: str, target_language: str) -> str:
+        """Translates one segment, returning 'ERROR: ...' once retries are exhausted."""
+        return self.engine.run(self.engine.translate_one(content, target_language))
+
+    def translate_many(self, contents: Sequence[str], target_language: str,
+                       progress: Optional[Callable[[int], None]] = None) -> List[str]:
+        return self.engine.run(self.engine.translate_many(contents, target_language, progress))
+
+    def close(self):
+        self.engine.close()
@@ -0,0 +1,134 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+from config import CACHE_CONFIG
+from html_tokenizer import tokenize, render, normalize_tokens
+
+logger = logging.getLogger('website_translator')
+
+
+class TranslationMemory:
+    """On-disk translation cache keyed by (source lang, target lang, model, normalized text hash)."""
+
+    def __init__(self, path: str = CACHE_CONFIG['path'], max_entries: int = CACHE_CONFIG['max_entries'],
+                 touch_interval: float = CACHE_CONFIG['touch_interval']):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Hits update last_used in batches: key -> time of its latest hit since the last flush
+        self.touch_interval = touch_interval
+        self._touched: Dict[tuple, float] = {}
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_lang, target_lang, model, text_hash)
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Hashes the normalized form of a segment so formatting-only differences share an entry."""
+        normalized = render(normalize_tokens(tokenize(text))).strip()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, text: str, source_lang: str, target_lang: str, model: str) -> Optional[str]:
+        """Returns the cached translation, or None on a miss."""
+        key = (source_lang.lower(), target_lang.lower(), model, self.text_hash(text))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation FROM translations "
+                "WHERE source_lang = ? AND target_lang = ? AND model = ? AND text_hash = ?", key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if time.monotonic() - self._flushed >= self.touch_interval:
+                self._flush_touched()
+                self._conn.commit()
+            return row[0]
+
+    def _flush_touched(self):
+        """Writes the pending last_used updates of recent hits (caller holds the lock and commits)."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE translations SET last_used = ? "
+                "WHERE source_lang = ? AND target_lang = ? AND model = ? AND text_hash = ?",
+                [(used,) + key for key, used in self._touched.items()])
+            self._touched.clear()
+        self._flushed = time.monotonic()
+
+    def put(self, text: str, translation: str, source_lang: str, target_lang: str, model: str):
+        """Stores a translation and evicts least recently used entries beyond max_entries."""
+        key = (source_lang.lower(), target_lang.lower(), model, self.text_hash(text))
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE translations SET translation = ?, last_used = ? "
+                "WHERE source_lang = ? AND target_lang = ? AND model = ? AND text_hash = ?",
+                (translation, time.time()) + key).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO translations "
+                    "(source_lang, target_lang, model, text_hash, translation, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (translation, time.time()))
+                self._size += 1
+            if self._size > self.max_entries:
+                self._flush_touched()  # So eviction sees which entries were used recently
+                evicted = self._conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)",
+                    (self._size - self.max_entries,)).rowcount
+                self._size -= evicted
+                logger.info(f"Translation memory evicted {evicted} entries.")
+            self._conn.commit()
+
+    def delete(self, text: str, source_lang: str, target_lang: str, model: str):
+        """Removes a cached translation, e.g. one that failed validation, so it is requested again."""
+        key = (source_lang.lower(), target_lang.lower(), model, self.text_hash(text))
+        with self._lock:
+            self._size -= self._conn.execute(
+                "DELETE FROM translations "
+                "WHERE source_lang = ? AND target_lang = ? AND model = ? AND text_hash = ?", key).rowcount
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters, hit rate and current entry count."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': self._size
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+def open_translation_memory() -> Optional[TranslationMemory]:
+    """Opens the configured translation memory, or returns None when caching is disabled."""
+    if not CACHE_CONFIG['enabled']:
+        return None
+    return TranslationMemory(CACHE_CONFIG['path'], CACHE_CONFIG['max_entries'], CACHE_CONFIG['touch_interval'])
@@ -1,36 +1,290 @@
+import os
 import logging
 import pandas as pd
-from openai_client import OpenAITranslationClient
+from typing import Dict, List, Optional, Sequence
 from HTML_in_CSV_Processor import HTMLProcessor
-from config import API_CONFIG
+from config import API_CONFIG, BATCH_CONFIG, LANGUAGE_CONFIG, TRANSLATION_CONFIG
+from parallel import parallel_map
+from columnar import read_table, write_table
+from checkpoint import CheckpointJournal, open_journal
+from translation_memory import open_translation_memory
+from translation_engine import AsyncTranslationEngine, create_backend
+from chunker import chunk_all, stitch_all, translate_chunked
+from masking import mask_all, unmask_all
+from prefilter import untranslatable
+from metrics import METRICS
+from html_structure import tag_signature
+from incremental import PreviousTranslations, identity_columns
 
 logger = logging.getLogger('website_translator')
 
+TRANSLATABLE_TYPES = ["RICH_TEXT", "FULL_HTML", "CSS/JS"]
+
+
+def default_target_languages() -> List[str]:
+    """Target language codes configured in LANGUAGE_CONFIG['languages'], upper-cased as used in column names."""
+    return [code.upper() for code in LANGUAGE_CONFIG['languages']]
+
+
+def translate_deduplicated_targets(values: pd.Series, translate_targets, target_languages: Sequence[str],
+                                   journal: Optional[CheckpointJournal] = None) -> Dict[str, pd.Series]:
+    """
+    Translates each distinct value once per target language and broadcasts the results back to
+    every row holding it. translate_targets receives the list of distinct values and the target
+    languages and returns {language: translations in order}.
+    Values should already be normalized so formatting-only differences collapse together.
+
+    With a checkpoint journal, rows it already holds in every language (same row ID and content)
+    are reused, and the rest are translated checkpoint_interval distinct values at a time, each
+    slice journaled as it finishes.
+    """
+    translations = {language: {} for language in target_languages}
+    done = {language: {} for language in target_languages}
+    pending = values
+    if journal is not None:
+        finished = []
+        for row, value in values.items():
+            previous = {language: journal.get(row, value, language) for language in target_languages}
+            if all(translation is not None for translation in previous.values()):
+                finished.append(row)
+                for language, translation in previous.items():
+                    done[language][row] = translation
+        if finished:
+            print(f"♻️ Resuming: {len(finished)} rows already translated in {journal.path}")
+        pending = values[~values.index.isin(finished)]
+
+    unique_values = list(pending.unique())
+    step = TRANSLATION_CONFIG['checkpoint_interval'] if journal is not None else len(unique_values)
+    rows_by_value = {}
+    if journal is not None:
+        for row, value in pending.items():
+            rows_by_value.setdefault(value, []).append(row)
+
+    for start in range(0, len(unique_values), max(step, 1)):
+        batch = unique_values[start:start + step]
+        results = translate_targets(batch, target_languages)
+        for language in target_languages:
+            translations[language].update(zip(batch, results[language]))
+        if journal is not None:
+            # Failed translations are not journaled so a restart retries them
+            journal.record((row, value, result, language) for language in target_languages
+                           for value, result in zip(batch, results[language])
+                           if not result.startswith("ERROR:") for row in rows_by_value[value])
+
+    total = len(pending)
+    ratio = total / len(unique_values) if len(unique_values) else 1.0
+    print(f"🔁 Deduplicated {total} rows to {len(unique_values)} unique values (dedup ratio {ratio:.2f}x)")
+    logger.info(f"Dedup: {total} rows -> {len(unique_values)} unique values ({ratio:.2f}x)")
+
+    series = {}
+    for language in target_languages:
+        series[language] = values.map(translations[language])
+        if done[language]:
+            series[language].update(pd.Series(done[language], dtype=object))
+    return series
+
+
+def translate_deduplicated(values: pd.Series, translate_many, journal: Optional[CheckpointJournal] = None) -> pd.Series:
+    """
+    Single-target translate_deduplicated_targets: translate_many receives the list of distinct
+    values and returns their translations in order.
+    """
+    return translate_deduplicated_targets(
+        values, lambda batch, _: {None: translate_many(batch)}, [None], journal)[None]
+
+
+def structure_mismatches(values: Sequence[str], translations: Sequence[str],
+                         signatures: Optional[Sequence[bytes]] = None) -> List[int]:
+    """
+    Indices whose translation does not have the same tags in the same order as its source value,
+    compared by tag signature. Failed ('ERROR: ...') translations are not counted.
+    """
+    if signatures is None:
+        signatures = [tag_signature(value) for value in values]
+    return [index for index, (signature, translation) in enumerate(zip(signatures, translations))
+            if isinstance(translation, str) and not translation.startswith("ERROR:")
+            and tag_signature(translation) != signature]
+
+
+def translate_targets(values, engine, target_languages, processor,
+                      retries: int = TRANSLATION_CONFIG['validation_retries']) -> Dict[str, List[str]]:
+    """
+    Translates values into every target language with their markup masked as placeholders. Values
+    are masked and chunked once; the per-language requests then run concurrently on one engine.
+    Values whose placeholders do not all come back are translated again with the full HTML and
+    rebuilt from their structure. Translations whose tag signature differs from their source are
+    dropped from the translation memory and requested again, up to retries times.
+    Values with no text left after masking (layout-only markup, links, numbers) are not sent and
+    come back unchanged.
+    """
+    packed = BATCH_CONFIG['enabled']
+    with METRICS.stage('mask'):
+        masked = mask_all(values)
+        texts = [item.text for item in masked]
+        chunked = chunk_all(texts)
+    with METRICS.stage('prefilter'):
+        skipped = untranslatable(masked, chunked, engine.backend.estimate_tokens, len(target_languages))
+    with METRICS.stage('api'):
+        translated = engine.translate_all_targets(
+            [chunk for index, chunks in enumerate(chunked) if index not in skipped for chunk in chunks],
+            target_languages, packed=packed)
+
+    results = {}
+    structures = {}
+    for language in target_languages:
+        with METRICS.stage('reconstruct'):
+            # Skipped chunks stand in for their own translation
+            replies = iter(translated[language])
+            flat = [chunk if index in skipped else next(replies)
+                    for index, chunks in enumerate(chunked) for chunk in chunks]
+            results[language] = unmask_all(masked, stitch_all(texts, chunked, flat))
+        fallback = [index for index, result in enumerate(results[language]) if result is None]
+        if not fallback:
+            continue
+        logger.warning(f"Retrying {len(fallback)} values without masking ({language}).")
+        METRICS.count('unmasked_fallbacks', len(fallback))
+        fallback_values = [values[index] for index in fallback]
+        with METRICS.stage('api'):
+            retried = translate_chunked(
+                fallback_values, lambda chunks: engine.translate_all(chunks, language, packed=packed))
+        with METRICS.stage('reconstruct'):
+            for index, value, translation in zip(fallback, fallback_values, retried):
+                if index not in structures:
+                    structures[index] = processor.extract_html_structure(value)
+                results[language][index] = processor.reconstruct_html_from_structure(structures[index], translation)
+
+    with METRICS.stage('validate'):
+        signatures = [tag_signature(value) for value in values]
+        mismatched = {language: structure_mismatches(values, results[language], signatures)
+                      for language in target_languages}
+    for language, indices in mismatched.items():
+        if not indices:
+            continue
+        METRICS.count('structure_mismatches', len(indices))
+        if retries <= 0:
+            logger.error(f"{len(indices)} translations into {language} still differ from their source structure.")
+            continue
+        logger.warning(f"Retrying {len(indices)} translations into {language} with mismatched structure.")
+        retry_values = [values[index] for index in indices]
+        # Both the masked chunks and the unmasked fallback chunks may hold the bad reply
+        engine.forget([chunk for chunks in chunk_all([item.text for item in mask_all(retry_values)]) for chunk in chunks]
+                      + [chunk for chunks in chunk_all(retry_values) for chunk in chunks], language)
+        retried = translate_targets(retry_values, engine, [language], processor, retries - 1)[language]
+        for index, translation in zip(indices, retried):
+            results[language][index] = translation
+    return results
+
+
+def flag_structure_mismatches(df: pd.DataFrame, rows: pd.Series, target_languages: Sequence[str]) -> int:
+    """
+    Adds a STRUCTURE_OK_<LANG> column per language that is False on the selected rows whose
+    VALUE_<LANG> still has different tags than VALUE, so they can be reviewed. Returns the number
+    of flagged cells.
+    """
+    flagged = 0
+    with METRICS.stage('validate'):
+        values = df.loc[rows, "VALUE"].tolist()
+        signatures = [tag_signature(value) for value in values]
+        for language in target_languages:
+            column = f"STRUCTURE_OK_{language}"
+            df[column] = True
+            mismatched = structure_mismatches(values, df.loc[rows, f"VALUE_{language}"].tolist(), signatures)
+            if mismatched:
+                df.loc[df.index[rows.to_numpy()][mismatched], column] = False
+                print(f"⚠️ {len(mismatched)} rows in VALUE_{language} differ from the source structure (see {column})")
+            flagged += len(mismatched)
+    return flagged
+
+
+def translate_values(values, engine, target_language, processor):
+    """Single-language translate_targets."""
+    return translate_targets(values, engine, [target_language], processor)[target_language]
+
+
 def process_translation(input_csv, output_csv, api_key, target_language="EN"):
     """
     Loads a CSV, translates only translatable content, and ensures HTML is preserved.
     """
-    df = pd.read_csv(input_csv)
+    return process_translation_all(input_csv, output_csv, api_key, [target_language])
+
+
+def process_translation_all(input_csv, output_csv, api_key, target_languages=None, split_files=False,
+                            previous_output=None):
+    """
+    Loads a CSV once and translates its translatable content into every target language
+    (default: LANGUAGE_CONFIG['languages']), adding a VALUE_<LANG> column per language.
+    With split_files each language is also written to its own <output>_<LANG>.csv. The input and
+    outputs may also be Parquet or Arrow files (by suffix), e.g. a columnar intermediate.
+    With previous_output (the translated CSV of an earlier export of the same site), rows whose
+    identity and normalized VALUE are unchanged keep their previous translations; only new or
+    modified rows are translated.
+    """
+    if isinstance(target_languages, str):
+        target_languages = [target_languages]
+    target_languages = list(target_languages or default_target_languages())
+    METRICS.reset()
+    METRICS.start_snapshots()
+    with METRICS.stage('read_csv'):
+        df = read_table(input_csv)
 
     if "VALUE" not in df.columns:
         raise ValueError("CSV is missing the 'VALUE' column.")
 
-    translator = OpenAITranslationClient(api_key)
+    memory = open_translation_memory()
+    engine = AsyncTranslationEngine(create_backend(api_key=api_key), memory=memory)
     processor = HTMLProcessor()  # ✅ Use HTMLProcessor to preserve formatting
+    journal = open_journal(output_csv)
 
     # Normalize HTML before translation
-    df["VALUE"] = df["VALUE"].apply(processor.normalize_html)
-
-    # Translate only RICH_TEXT, FULL_HTML, and CSS/JS content
-    df["VALUE_EN"] = df.apply(
-        lambda row: processor.reconstruct_html_from_structure(
-            processor.extract_html_structure(row["VALUE"]),
-            translator.translate_text(row["VALUE"], target_language)
-        ) if row["CONTENT_TYPE"] in ["RICH_TEXT", "FULL_HTML", "CSS/JS"] else row["VALUE"],
-        axis=1
-    )
-
-    df.to_csv(output_csv, index=False)
-    print(f"✅ Translated and saved to {output_csv}")
+    with METRICS.stage('normalize'):
+        df["VALUE"] = parallel_map(processor.normalize_html, df["VALUE"].tolist())
+
+    # Translate only RICH_TEXT, FULL_HTML, and CSS/JS content, once per distinct value
+    translatable = df["CONTENT_TYPE"].isin(TRANSLATABLE_TYPES)
+    carried = {}
+    if previous_output is not None:
+        previous = PreviousTranslations(previous_output, target_languages, identity_columns(df))
+        carried = previous.carry_forward(df, translatable)
+        print(f"⏩ Incremental: {len(carried)} unchanged rows carried forward, "
+              f"{int(translatable.sum()) - len(carried)} new or modified rows to translate")
+    to_translate = translatable & ~df.index.isin(list(carried))
+    with METRICS.stage('translate'):
+        translated = translate_deduplicated_targets(
+            df.loc[to_translate, "VALUE"],
+            lambda values, languages: translate_targets(values, engine, languages, processor),
+            target_languages,
+            journal
+        )
+    for language in target_languages:
+        column = f"VALUE_{language}"
+        df[column] = df["VALUE"]
+        df.loc[to_translate, column] = translated[language]
+        if carried:
+            df.loc[list(carried), column] = [translations[language] for translations in carried.values()]
+
+    flag_structure_mismatches(df, translatable, target_languages)
+
+    with METRICS.stage('write_csv'):
+        write_table(df, output_csv)
+    print(f"✅ Translated into {', '.join(target_languages)} and saved to {output_csv}")
+    if split_files:
+        root, extension = os.path.splitext(output_csv)
+        language_columns = [f"VALUE_{language}" for language in target_languages]
+        for language in target_languages:
+            language_csv = f"{root}_{language}{extension or '.csv'}"
+            write_table(df.drop(columns=[column for column in language_columns if column != f"VALUE_{language}"]),
+                        language_csv)
+            print(f"✅ {language} saved to {language_csv}")
+    if journal is not None:
+        journal.remove()
+    engine.close()
+
+    if memory is not None:
+        stats = memory.stats()
+        print(f"📦 Translation memory: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate, {stats['size']} entries)")
+        memory.close()
+    METRICS.count('rows', len(df))
+    METRICS.report()
 
     return df